@@ -0,0 +1,46 @@
+# Times `hk.transform` without checks, with the separate check pass and with
+# `check="fused"`, over a `List - Dict - List` swapped at its two outer levels
+# and a `List - List - List` rotated at every level.
+#
+#     python -m benchmarks.checks [--rows N] [--number N]
+
+import argparse
+import random
+import timeit
+
+import hako as hk
+
+CASES = [
+    ("swap", hk.List - hk.Dict["x", "y", "z"] - hk.List, "ab -> ba"),
+    ("rotate", hk.List - hk.List - hk.List, "abc -> cab"),
+]
+
+
+def make_value(name: str, rows: int) -> list:
+    rng = random.Random(0)
+    if name == "swap":
+        return [
+            {key: [rng.random() for _ in range(16)] for key in ("x", "y", "z")}
+            for _ in range(rows)
+        ]
+    return [[[rng.random() for _ in range(4)] for _ in range(16)] for _ in range(rows // 16)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    options = parser.parse_args()
+
+    for name, hier, perm in CASES:
+        val = make_value(name, options.rows)
+        expected = hk.transform(hier, perm=perm, check=False)(val)
+        for check in [False, True, "fused"]:
+            transform = hk.transform(hier, perm=perm, check=check)
+            assert transform(val) == expected
+            timing = min(timeit.repeat(lambda: transform(val), number=options.number, repeat=3))
+            print(f"{name:<8} check={check!r:<8} {timing / options.number * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
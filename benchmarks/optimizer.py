@@ -0,0 +1,50 @@
+# Times generated functions with and without `hako.codegen.optimizer`, and
+# checks that both produce the same results.
+#
+#     python -m benchmarks.optimizer [--number N]
+
+import argparse
+import timeit
+
+import hako as hk
+from hako import boxes
+from hako.codegen import optimizer
+from hako.operators.cachelib import cache_clear
+
+HIER = boxes.List - boxes.Dict["a", "b"] - boxes.Tuple
+VAL = [{"a": tuple(range(8)), "b": tuple(range(8))} for _ in range(256)]
+
+CASES = {
+    "isa": (lambda: hk.isa(HIER), (VAL,)),
+    "map": (lambda: hk.map(HIER, lazy=False, ninputs=1), (abs, VAL)),
+    "flatten": (lambda: hk.flatten(HIER, lazy=False), (VAL,)),
+    "transform": (lambda: hk.transform(HIER, perm="abc -> cab"), (VAL,)),
+}
+
+
+def measure(optimized: bool, number: int) -> dict:
+    cache_clear()
+    (optimizer.enable if optimized else optimizer.disable)()
+    results = {}
+    for name, (make, args) in CASES.items():
+        func = make()
+        timings = timeit.repeat(lambda: func(*args), number=number, repeat=5)
+        results[name] = (func(*args), min(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200)
+    options = parser.parse_args()
+
+    baseline = measure(False, options.number)
+    optimized = measure(True, options.number)
+    for name in CASES:
+        (expected, before), (result, after) = baseline[name], optimized[name]
+        assert result == expected, name
+        print(f"{name:<10} {before * 1e3:8.2f}ms {after * 1e3:8.2f}ms {before / after:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
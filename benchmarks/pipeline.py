@@ -0,0 +1,77 @@
+# Times `isa`, `transform`, `tree_map` and `map` called one after the other
+# against the same stages fused by `hk.pipeline`, over a `List - Dict - List`,
+# then the same without `map`, the result being returned in containers.
+#
+#     python -m benchmarks.pipeline [--rows N] [--number N]
+
+import argparse
+import random
+import timeit
+
+import hako as hk
+
+HIER = hk.List - hk.Dict["x", "y", "z"] - hk.List
+TRANSPOSED = hk.Dict["x", "y", "z"] - hk.List - hk.List
+
+
+def make_value(rows: int) -> list:
+    rng = random.Random(0)
+    return [
+        {key: [rng.random() for _ in range(16)] for key in ("x", "y", "z")}
+        for _ in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    options = parser.parse_args()
+
+    val = make_value(options.rows)
+
+    def scale(x):
+        return x * 2.0 + 1.0
+
+    isa = hk.isa(HIER)
+    transform = hk.transform(HIER, perm="ab -> ba")
+    tree_map = hk.tree_map(TRANSPOSED)
+    map_ = hk.map(TRANSPOSED, lazy=False)
+
+    def chained():
+        assert isa(val)
+        return map_(round, tree_map(scale, transform(val)))
+
+    fused = hk.pipeline(
+        HIER,
+        [
+            hk.isa,
+            (hk.transform, {"perm": "ab -> ba"}),
+            (hk.tree_map, scale),
+            (hk.map, round, {"lazy": False}),
+        ],
+    )
+
+    def chained_containers():
+        assert isa(val)
+        return tree_map(scale, transform(val))
+
+    fused_containers = hk.pipeline(
+        HIER,
+        [hk.isa, (hk.transform, {"perm": "ab -> ba"}), (hk.tree_map, scale)],
+    )
+
+    assert chained() == fused(val)
+    assert chained_containers() == fused_containers(val)
+    for name, run in [
+        ("chained", chained),
+        ("fused", lambda: fused(val)),
+        ("chained[c]", chained_containers),
+        ("fused[c]", lambda: fused_containers(val)),
+    ]:
+        timing = min(timeit.repeat(run, number=options.number, repeat=3)) / options.number
+        print(f"{name:<12} {timing * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Times `hk.transform` permuting every level of nested lists with strides over
+# one flat buffer, against the nested index loops still used with `lazy=True`.
+#
+#     python -m benchmarks.strided [--rows N] [--number N]
+
+import argparse
+import random
+import timeit
+
+import hako as hk
+
+CASES = [
+    ("abc -> cab", hk.List - hk.List - hk.List, (32, 8)),
+    ("abcd -> dbca", hk.List - hk.List - hk.List - hk.List, (4, 8, 8)),
+]
+
+
+def make_value(rows: int, dims: tuple) -> list:
+    rng = random.Random(0)
+
+    def make(dims):
+        if not dims:
+            return rng.random()
+        return [make(dims[1:]) for _ in range(dims[0])]
+
+    return [make(dims) for _ in range(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--number", type=int, default=5)
+    options = parser.parse_args()
+
+    for perm, hier, dims in CASES:
+        val = make_value(options.rows, dims)
+        strided = hk.transform(hier, perm=perm)
+        looped = hk.transform(hier, perm=perm, lazy=True)
+
+        assert strided(val) == list(looped(val))
+        for name, run in [
+            ("strided", lambda: strided(val)),
+            ("looped", lambda: list(looped(val))),
+        ]:
+            timing = min(timeit.repeat(run, number=options.number, repeat=3)) / options.number
+            print(f"{perm:<14} {name:<8} {timing * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
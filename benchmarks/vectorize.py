@@ -0,0 +1,46 @@
+# Times `hk.map` calling its function once per leaf against `vectorize=True`
+# over a `List - Dict - List` of floats.
+#
+#     python -m benchmarks.vectorize [--rows N] [--number N]
+
+import argparse
+import random
+import timeit
+
+import hako as hk
+
+HIER = hk.List - hk.Dict - hk.List
+
+
+def make_value(rows: int) -> list:
+    rng = random.Random(0)
+    return [
+        {key: [rng.random() for _ in range(16)] for key in ("x", "y", "z")}
+        for _ in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    options = parser.parse_args()
+
+    val = make_value(options.rows)
+    per_leaf = hk.map(HIER, lazy=False)
+    vectorized = hk.map(HIER, lazy=False, vectorize=True)
+
+    def scale(x):
+        return x * 2.0 + 1.0
+
+    assert per_leaf(scale, val) == vectorized(scale, val)
+    for name, run in [
+        ("per-leaf", lambda: per_leaf(scale, val)),
+        ("vectorized", lambda: vectorized(scale, val)),
+    ]:
+        timing = min(timeit.repeat(run, number=options.number, repeat=3)) / options.number
+        print(f"{name:<12} {timing * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
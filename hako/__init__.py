@@ -1,4 +1,13 @@
 from .codegen import register_constants
 from .operators.market import *
+from .operators.compiled import bind
 from .boxes.market import *
-from .bricks.boxbase import BoxBase
\ No newline at end of file
+from .bricks.boxbase import BoxBase
+from .misc.instrument import stats
+
+from . import flags as _flags
+
+if _flags.AOT_MODULES:
+    from .aot import load as _load_aot
+
+    _load_aot(*_flags.AOT_MODULES)
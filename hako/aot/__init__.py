@@ -0,0 +1,28 @@
+import importlib
+import typing as t
+
+from hako.codegen.magic import _BUILTIN_CONSTANTS
+from hako.operators import cachelib
+from hako.operators.bases import OPERATORS
+
+__all__ = ["install", "load"]
+
+
+def install(prebuilts: t.Sequence, entries: t.Sequence) -> None:
+    for prebuilt_key, wrapper, bindings in prebuilts:
+        constants = dict(_BUILTIN_CONSTANTS)
+        constants.update(bindings)
+        code = wrapper.__code__
+        params = code.co_varnames[: code.co_argcount]
+        func = wrapper(*[constants[name] for name in params])
+        cachelib.prebuilt_set(prebuilt_key, func)
+
+    # seed the operator cache by running the usual lookup path once, which
+    # now resolves to the prebuilt functions instead of generating code
+    for name, hier, options in entries:
+        OPERATORS[name](hier, **options)
+
+
+def load(*module_names: str) -> None:
+    for module_name in module_names:
+        importlib.import_module(module_name)
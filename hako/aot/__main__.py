@@ -0,0 +1,35 @@
+import sys
+import runpy
+import argparse
+
+from .emitter import normalize_entries, collect, render_module
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m hako.aot",
+        description="Compile the hierarchies declared in SPEC into an importable module.",
+    )
+    parser.add_argument(
+        "spec",
+        help="Python file defining `HAKO_AOT`, a list of hierarchies "
+        "or (operator, hier[, options]) tuples",
+    )
+    parser.add_argument("-o", "--output", default="hako_compiled.py")
+    args = parser.parse_args(argv)
+
+    spec = runpy.run_path(args.spec)
+    if "HAKO_AOT" not in spec:
+        parser.error(f"{args.spec} does not define HAKO_AOT")
+
+    entries = normalize_entries(spec["HAKO_AOT"])
+    prebuilts, entries = collect(entries)
+    source = render_module(prebuilts, entries, origin=args.spec)
+    with open(args.output, "w") as f:
+        f.write(source)
+    print(f"{len(prebuilts)} functions written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import math
+import typing as t
+from importlib import import_module
+
+from hako.codegen.magic import _BUILTIN_CONSTANTS, GeneratedFunc, capture_generated
+from hako.codegen.snippets import CODE_INDENT_1
+from hako.bricks.shaping import ShapeNode, create_hierarchy
+from hako.misc import profiling
+from hako.misc.exceptions import BoxUnsupported
+from hako.operators import cachelib
+from hako.operators.bases import OPERATORS, BUILD_HOOKS
+
+__all__ = ["normalize_entries", "collect", "render_module"]
+
+DEFAULT_OPERATORS = ("isa", "map", "visit", "flatten", "lift")
+DEFAULT_NINPUTS = (1, 2)
+
+Entry = t.Tuple[str, tuple, dict]
+Prebuilt = t.Tuple[tuple, GeneratedFunc]
+
+# operators implied by a bare hierarchy are skipped if some box does not
+# support them, e.g. `lift` over a multi-key `Dict` or over `Attrs` selecting
+# some fields only, which is refused with BoxUnsupported
+_Implied = t.NamedTuple("_Implied", [("name", str), ("hier", tuple), ("options", dict)])
+
+
+def _operator_name(op) -> t.Optional[str]:
+    name = getattr(op, "__name__", None)
+    if name is not None and OPERATORS.get(name) is op:
+        return name
+    return None
+
+
+def normalize_entries(spec_entries: t.Iterable) -> t.List[Entry]:
+    entries = []
+    for spec_entry in spec_entries:
+        if spec_entry.__class__ is tuple and spec_entry:
+            name = _operator_name(spec_entry[0])
+        else:
+            name = None
+
+        if name is None:
+            hier, determined = create_hierarchy(spec_entry)
+            if not determined:
+                raise ValueError(f"hierarchy should not contain placeholder `...`")
+            for name in DEFAULT_OPERATORS:
+                entries.extend(_expand_ninputs(_Implied._make, name, hier, {}))
+            continue
+
+        if len(spec_entry) not in (2, 3):
+            raise ValueError(f"expect (operator, hier[, options]), got {spec_entry!r}")
+        hier, determined = create_hierarchy(spec_entry[1])
+        if not determined:
+            raise ValueError(f"hierarchy should not contain placeholder `...`")
+        options = dict(spec_entry[2]) if len(spec_entry) == 3 else {}
+        entries.extend(_expand_ninputs(tuple, name, hier, options))
+    return entries
+
+
+def _expand_ninputs(make, name: str, hier: tuple, options: dict) -> t.List[Entry]:
+    # variadic operators only build the variant for the number of inputs they
+    # are called with, keep the dispatching entry along with the common ones
+    entries = [make((name, hier, options))]
+    if "ninputs" in (OPERATORS[name].__kwdefaults__ or {}) and options.get("ninputs") is None:
+        for ninputs in DEFAULT_NINPUTS:
+            entries.append(make((name, hier, dict(options, ninputs=ninputs))))
+    return entries
+
+
+def collect(
+    entries: t.Sequence[Entry],
+) -> t.Tuple[t.List[Prebuilt], t.List[Entry]]:
+    built = {}
+    kept = []
+
+    def _hook(prebuilt_key, func):
+        built.setdefault(prebuilt_key, func)
+
+    # start from scratch so that every entry actually runs its build functions
+    cachelib.cache_clear()
+    cachelib.prebuilt.clear()
+
+    # profiled functions carry counters meant for this process only
+    profiling_enabled = profiling.ENABLED
+    profiling.disable()
+    BUILD_HOOKS.append(_hook)
+    try:
+        with capture_generated() as captured:
+            for entry in entries:
+                name, hier, options = entry
+                try:
+                    OPERATORS[name](hier, **options)
+                except (NotImplementedError, BoxUnsupported):
+                    if entry.__class__ is not _Implied:
+                        raise
+                    continue
+                kept.append((name, hier, options))
+    finally:
+        BUILD_HOOKS.remove(_hook)
+        if profiling_enabled:
+            profiling.enable()
+
+    by_func = {id(generated.func): generated for generated in captured}
+    prebuilts = []
+    for prebuilt_key, func in built.items():
+        generated = by_func.get(id(func))
+        if generated is None:
+            raise TypeError(f"{prebuilt_key[:2]!r} did not build its function via codegen")
+        prebuilts.append((prebuilt_key, generated))
+    return prebuilts, kept
+
+
+def _is_hierarchy(value: tuple) -> bool:
+    return all(x.__class__ is ShapeNode for x in value)
+
+
+class _Renderer:
+    def __init__(self) -> None:
+        self.imports = set()
+        self.names = {}
+
+    def _render_class(self, klass: type) -> str:
+        module, qualname = klass.__module__, klass.__qualname__
+        target = import_module(module)
+        for attr in qualname.split("."):
+            target = getattr(target, attr, None)
+        if target is not klass:
+            raise TypeError(f"class {klass!r} is not importable")
+        self.imports.add(module)
+        return f"{module}.{qualname}"
+
+    def __call__(self, value) -> str:
+        class_ = value.__class__
+        if value is None or value is ... or class_ in (bool, int, str, bytes):
+            return repr(value)
+        if class_ is float:
+            if not math.isfinite(value):
+                return f"float({str(value)!r})"
+            return repr(value)
+        if class_ is ShapeNode:
+            args = ", ".join(map(self, value))
+            return f"{self._render_class(ShapeNode)}({args})"
+        if class_ is tuple:
+            name = self.names.get(value) if _is_hierarchy(value) else None
+            if name is not None:
+                return name
+            if len(value) == 1:
+                return f"({self(value[0])},)"
+            return "(" + ", ".join(map(self, value)) + ")"
+        if class_ is list:
+            return "[" + ", ".join(map(self, value)) + "]"
+        if class_ in (set, frozenset):
+            items = ", ".join(map(self, value))
+            return f"{class_.__name__}([{items}])"
+        if class_ is dict:
+            items = ", ".join(f"{self(k)}: {self(v)}" for k, v in value.items())
+            return "{" + items + "}"
+        if isinstance(value, type):
+            return self._render_class(value)
+        raise TypeError(f"cannot render constant {value!r} of type {class_!r}")
+
+
+def _render_wrapper(index: int, generated: GeneratedFunc) -> t.Tuple[str, dict]:
+    params = []
+    bindings = {}
+    for name, value in generated.constants.items():
+        if name == "__builtins__":
+            continue
+        params.append(name)
+        if _BUILTIN_CONSTANTS.get(name, bindings) is not value:
+            bindings[name] = value
+
+    source = (
+        f"def __WRAPPER_{index}__({', '.join(params)}):\n"
+        f"{CODE_INDENT_1}def {generated.name}({generated.func_sig}):"
+        f"{generated.func_body}\n"
+        f"{CODE_INDENT_1}return {generated.name}\n"
+    )
+    return source, bindings
+
+
+def render_module(
+    prebuilts: t.Sequence[Prebuilt],
+    entries: t.Sequence[Entry],
+    origin: str = "",
+) -> str:
+    render = _Renderer()
+    hier_lines = []
+    for _, hier, _ in entries:
+        if hier not in render.names:
+            hier_lines.append(f"HIER_{len(hier_lines)} = {render(hier)}")
+            render.names[hier] = f"HIER_{len(render.names)}"
+
+    chunks = []
+    prebuilt_lines = []
+    for index, (prebuilt_key, generated) in enumerate(prebuilts):
+        source, bindings = _render_wrapper(index, generated)
+        chunks.append(source)
+        prebuilt_lines.append(
+            f"{CODE_INDENT_1}({render(prebuilt_key)}, __WRAPPER_{index}__, {render(bindings)}),"
+        )
+    entry_lines = [f"{CODE_INDENT_1}{render(entry)}," for entry in entries]
+
+    command = " ".join(filter(None, ["python -m hako.aot", origin]))
+    header = [f"# Generated by `{command}`. Do not edit.", "from hako.aot import install"]
+    header.extend(f"import {module}" for module in sorted(render.imports))
+    footer = [
+        "PREBUILTS = [",
+        *prebuilt_lines,
+        "]",
+        "",
+        "ENTRIES = [",
+        *entry_lines,
+        "]",
+        "",
+        "install(PREBUILTS, ENTRIES)",
+    ]
+    chunks = ["\n".join(header), "\n".join(hier_lines), *chunks, "\n".join(footer)]
+    return "\n\n".join(chunks) + "\n"
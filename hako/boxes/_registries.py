@@ -4,4 +4,11 @@ CLASS2BOXTYPE_MAPPING = {
     tuple: Tuple,
     dict: Dict,
     list: List,
+    set: Set,
+    frozenset: FrozenSet,
 }
+
+if "Array" in globals():
+    import numpy
+
+    CLASS2BOXTYPE_MAPPING[numpy.ndarray] = Array
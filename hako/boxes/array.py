@@ -0,0 +1,55 @@
+import numpy as np
+
+from hako.bricks.boxbase import BoxBase
+from hako.codegen import register_constants
+
+
+# One level per axis: a `(2, 3)` array is `Array - Array`, iterated along its
+# first axis like a list of rows.
+class Array(BoxBase):
+    @classmethod
+    def __guess__(cls, v):
+        return Array
+
+    @classmethod
+    def __pick_element__(cls, v):
+        return v[0]
+
+
+def array_stack(items, inner_shape=()) -> np.ndarray:
+    items = list(items)
+    if not items:
+        # the shape of the axes below is only known from the original array
+        return np.empty((0,) + inner_shape)
+    if items[0].__class__ is np.ndarray:
+        return np.stack(items)
+    if items[0].__class__ in (list, tuple, dict):
+        # keep containers of other boxes as they are instead of unpacking them
+        ret = np.empty(len(items), dtype=object)
+        for i, item in enumerate(items):
+            ret[i] = item
+        return ret
+    return np.array(items)
+
+
+register_constants(
+    ndarray=np.ndarray,
+    array_stack=array_stack,
+    array_empty=np.empty,
+    array_moveaxis=np.moveaxis,
+)
+
+
+Array.Primitives.ISNOTA("({VAL}.__class__ is not ndarray or not {VAL}.ndim)")
+Array.Primitives.ITER("iter({VAL})")
+Array.Primitives.NEW_FROM_ITER("array_stack({VAL})")
+Array.Primitives.NEW_FROM_ITER2("array_stack({VAL}, {PROOF})")
+Array.Primitives.NEW_FROM_ITER2_PROOF("{VAL}.shape[1:]")
+Array.Primitives.NEW("array_stack(({VAL},))")
+Array.Primitives.GET_INDICES("range({VAL}.shape[0])")
+Array.Primitives.GET_DUMMY("array_empty((0,))")
+Array.Primitives.PICK("{VAL}[0]")
+Array.Primitives.GET_LENGTH("{VAL}.shape[0]")
+
+Array.Heuristics.IS_NAIVE_ITERATOR(True)
+Array.Heuristics.IS_ARRAY_AXIS(True)
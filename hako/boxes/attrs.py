@@ -0,0 +1,146 @@
+import dataclasses
+from operator import attrgetter
+
+from hako.bricks.boxbase import BoxBase
+from hako.codegen import register_constants
+from hako.misc.exceptions import BoxUnsupported
+
+register_constants(getattr=getattr)
+
+
+def _all_fields(class_: type) -> tuple:
+    if dataclasses.is_dataclass(class_):
+        return tuple(field.name for field in dataclasses.fields(class_))
+    if hasattr(class_, "_fields"):  # namedtuple
+        return tuple(class_._fields)
+
+    fields = []
+    for klass in reversed(class_.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        if slots.__class__ is str:
+            slots = (slots,)
+        fields.extend(x for x in slots if x not in ("__dict__", "__weakref__"))
+    if not fields:
+        raise TypeError(f"cannot tell the fields of {class_!r}, give them explicitly")
+    return tuple(fields)
+
+
+# `Attrs[Class, "field"]`, `Attrs[Class, ("a", "b")]`, or `Attrs[Class]` for all
+# the fields of a dataclass, namedtuple or `__slots__` class. Instances must be
+# exactly of `Class`, and are rebuilt with `Class(**fields)` when all their
+# fields are selected.
+class Attrs(BoxBase):
+    @classmethod
+    def __specialize__(cls, arg):
+        if arg.__class__ is tuple:
+            class_, fields = arg
+        else:
+            class_, fields = arg, None
+
+        if not isinstance(class_, type):
+            raise TypeError(f"expect a class, got {class_!r}")
+        if fields is None:
+            fields = _all_fields(class_)
+        elif fields.__class__ is str:
+            return SingleAttr, (class_, fields)
+        return MultiAttrs, (class_, tuple(fields))
+
+
+def _make_dummy(class_: type, fields: tuple):
+    if issubclass(class_, tuple):  # namedtuple, whose fields cannot be set
+        placeholders = (...,) * len(class_._fields)
+        return lambda: class_._make(placeholders)
+
+    def dummy():
+        obj = class_.__new__(class_)
+        for field in fields:
+            object.__setattr__(obj, field, ...)
+        return obj
+
+    return dummy
+
+
+def _make_new(class_: type, fields: tuple):
+    def new(values):
+        return class_(**dict(zip(fields, values)))
+
+    return new
+
+
+# Only instances described by all their fields can be rebuilt, those of a
+# class whose fields cannot be told are assumed to be.
+def _code_new(code: str):
+    def code_func(GR) -> str:
+        class_, fields = GR.Node.mdata
+        try:
+            missing = [x for x in _all_fields(class_) if x not in fields]
+        except TypeError:
+            missing = []
+        if missing:
+            raise BoxUnsupported(
+                f"{GR.Node!r} cannot be rebuilt without the fields {missing!r} "
+                f"of {class_.__name__}"
+            )
+        return code
+
+    return code_func
+
+
+def _single_getter(fields: tuple):
+    getter = attrgetter(*fields)
+    return lambda obj: (getter(obj),)
+
+
+class SingleAttr(Attrs):
+    @classmethod
+    def __prepare_constants__(cls, mdata):
+        class_, field = mdata
+        return dict(
+            MDATA_CLASS=class_,
+            MDATA_FIELDS=(field,),
+            MDATA_GETTER=attrgetter(field),
+            MDATA_NEW=_make_new(class_, (field,)),
+            MDATA_DUMMY=_make_dummy(class_, (field,)),
+        )
+
+
+SingleAttr.Primitives.ISNOTA("({VAL}.__class__ is not {MDATA_CLASS})")
+SingleAttr.Primitives.ITER("({MDATA_GETTER}({VAL}),)")
+SingleAttr.Primitives.NEW(_code_new("{MDATA_NEW}(({VAL},))"))
+SingleAttr.Primitives.NEW_FROM_ITER(_code_new("{MDATA_NEW}({VAL})"))
+SingleAttr.Primitives.GET_INDICES("{MDATA_FIELDS}")
+SingleAttr.Primitives.GET_DUMMY("{MDATA_DUMMY}()")
+SingleAttr.Primitives.GET_ITEM("getattr({VAL}, {INDEX})")
+SingleAttr.Primitives.PICK("{MDATA_GETTER}({VAL})")
+SingleAttr.Primitives.GET_LENGTH("1")
+
+SingleAttr.Heuristics.SHAPE_IMPLIES_LENGTH(True)
+SingleAttr.Heuristics.IS_KEYED(True)
+
+
+class MultiAttrs(Attrs):
+    @classmethod
+    def __prepare_constants__(cls, mdata):
+        class_, fields = mdata
+        return dict(
+            MDATA_CLASS=class_,
+            MDATA_FIELDS=fields,
+            MDATA_GETTER=attrgetter(*fields) if len(fields) > 1 else _single_getter(fields),
+            MDATA_FIRST=attrgetter(fields[0]),
+            MDATA_NEW=_make_new(class_, fields),
+            MDATA_DUMMY=_make_dummy(class_, fields),
+            MDATA_LENGTH=len(fields),
+        )
+
+
+MultiAttrs.Primitives.ISNOTA("({VAL}.__class__ is not {MDATA_CLASS})")
+MultiAttrs.Primitives.ITER("{MDATA_GETTER}({VAL})")
+MultiAttrs.Primitives.NEW_FROM_ITER(_code_new("{MDATA_NEW}({VAL})"))
+MultiAttrs.Primitives.GET_INDICES("{MDATA_FIELDS}")
+MultiAttrs.Primitives.GET_DUMMY("{MDATA_DUMMY}()")
+MultiAttrs.Primitives.GET_ITEM("getattr({VAL}, {INDEX})")
+MultiAttrs.Primitives.PICK("{MDATA_FIRST}({VAL})")
+MultiAttrs.Primitives.GET_LENGTH("{MDATA_LENGTH}")
+
+MultiAttrs.Heuristics.SHAPE_IMPLIES_LENGTH(True)
+MultiAttrs.Heuristics.IS_KEYED(True)
@@ -21,6 +21,10 @@ class Dict(BoxBase):
     def __pick_element__(cls, v):
         return next(iter(v.values()))
 
+    @classmethod
+    def __fingerprint__(cls, v):
+        return tuple(v)
+
 
 register_constants(
     dict_values=dict.values,
@@ -38,6 +42,7 @@ VariadicDict.Primitives.ISNOTA2(
     "({VAL}.__class__ is not dict or not dict_keys({VAL}) >= {PROOF})"
 )
 VariadicDict.Primitives.ISNOTA2_PROOF(GET_INDICES)
+VariadicDict.Primitives.ISNOTA_CLASS("({VAL}.__class__ is not dict)")
 VariadicDict.Primitives.ITER("dict_values({VAL})")
 VariadicDict.Primitives.ITER2("map({VAL}.__getitem__, {PROOF})")
 VariadicDict.Primitives.ITER2_PROOF(GET_INDICES)
@@ -45,10 +50,12 @@ VariadicDict.Primitives.NEW_FROM_ITER2("dict(zip({PROOF}, {VAL}))")
 VariadicDict.Primitives.NEW_FROM_ITER2_PROOF(GET_INDICES)
 VariadicDict.Primitives.GET_INDICES(GET_INDICES)
 VariadicDict.Primitives.GET_DUMMY("{{}}")
+VariadicDict.Primitives.SET_ITEM("{VAL}[{INDEX}] = {ITEM}")
 VariadicDict.Primitives.PICK("next(iter({VAL}.values()))")
 VariadicDict.Primitives.GET_LENGTH("len({VAL})")
 
 VariadicDict.Heuristics.SHAPE_IMPLIES_LENGTH(True)
+VariadicDict.Heuristics.IS_KEYED(True)
 
 
 class SingleItemDict(Dict):
@@ -60,16 +67,19 @@ class SingleItemDict(Dict):
 SingleItemDict.Primitives.ISNOTA(
     "({VAL}.__class__ is not dict or {MDATA} not in {VAL})"
 )
+SingleItemDict.Primitives.ISNOTA_CLASS("({VAL}.__class__ is not dict)")
 SingleItemDict.Primitives.ITER("({VAL}[{MDATA}],)")
 SingleItemDict.Primitives.NEW("{{{MDATA}: {VAL}}}")
 SingleItemDict.Primitives.NEW_FROM_ITER("dict(zip({MDATA_TUPLE}, {VAL}))")
 SingleItemDict.Primitives.GET_INDICES("{MDATA_TUPLE}")
 SingleItemDict.Primitives.GET_DUMMY("{{{MDATA}: ...}}")
+SingleItemDict.Primitives.SET_ITEM("{VAL}[{INDEX}] = {ITEM}")
 SingleItemDict.Primitives.PICK("{VAL}[{MDATA}]")
 SingleItemDict.Primitives.GET_LENGTH("1")
 
 
 SingleItemDict.Heuristics.SHAPE_IMPLIES_LENGTH(True)
+SingleItemDict.Heuristics.IS_KEYED(True)
 
 
 class MultiItemsDict(Dict):
@@ -81,11 +91,14 @@ class MultiItemsDict(Dict):
 MultiItemsDict.Primitives.ISNOTA(
     "({VAL}.__class__ is not dict or not dict_keys({VAL}) >= {MDATA_SET})"
 )
+MultiItemsDict.Primitives.ISNOTA_CLASS("({VAL}.__class__ is not dict)")
 MultiItemsDict.Primitives.ITER("map({VAL}.__getitem__, {MDATA})")
 MultiItemsDict.Primitives.NEW_FROM_ITER("dict(zip({MDATA}, {VAL}))")
 MultiItemsDict.Primitives.GET_INDICES("{MDATA}")
 MultiItemsDict.Primitives.GET_DUMMY("{{I: ... for I in {MDATA}}}")
+MultiItemsDict.Primitives.SET_ITEM("{VAL}[{INDEX}] = {ITEM}")
 MultiItemsDict.Primitives.PICK("{VAL}[{MDATA}[0]]")
 MultiItemsDict.Primitives.GET_LENGTH("{MDATA_LENGTH}")
 
 MultiItemsDict.Heuristics.SHAPE_IMPLIES_LENGTH(True)
+MultiItemsDict.Heuristics.IS_KEYED(True)
@@ -0,0 +1,23 @@
+from collections.abc import Iterator
+
+from hako.bricks.boxbase import BoxBase
+from hako.codegen import register_constants
+
+
+# Any iterator, e.g. a generator of records read from a file. Items are checked
+# and consumed one at a time, the level itself is never materialized. Peeking
+# at an item would consume it, so this box is never guessed.
+class Iter(BoxBase):
+    pass
+
+
+register_constants(Iterator=Iterator, isinstance=isinstance)
+
+Iter.Primitives.ISNOTA("(not isinstance({VAL}, Iterator))")
+Iter.Primitives.ITER("{VAL}")
+Iter.Primitives.NEW_FROM_ITER("iter({VAL})")
+Iter.Primitives.NEW("iter(({VAL},))")
+Iter.Primitives.GET_DUMMY("iter(())")
+
+Iter.Heuristics.IS_NAIVE_ITERATOR(True)
+Iter.Heuristics.IS_STREAM(True)
@@ -17,7 +17,9 @@ List.Primitives.NEW_FROM_ITER("(list({VAL}))")
 List.Primitives.NEW("[{VAL},]")
 List.Primitives.GET_INDICES("range(len({VAL}))")
 List.Primitives.GET_DUMMY("[]")
+List.Primitives.SET_ITEM("{VAL}[{INDEX}] = {ITEM}")
 List.Primitives.PICK("{VAL}[0]")
 List.Primitives.GET_LENGTH("len({VAL})")
 
 List.Heuristics.IS_NAIVE_ITERATOR(True)
+List.Heuristics.IS_POSITIONAL(True)
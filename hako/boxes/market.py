@@ -1,3 +1,11 @@
 from .dict import Dict
 from .list import List
 from .tuple import Tuple
+from .set import Set, FrozenSet
+from .iter import Iter
+from .attrs import Attrs
+
+try:
+    from .array import Array
+except ImportError:  # numpy is optional
+    pass
@@ -0,0 +1,49 @@
+from hako.bricks.boxbase import BoxBase
+
+
+# Sets have no positions: their items are only reachable by iteration, so they
+# cannot take part in a permutation of `transform`. Several sets traversed
+# together must be equal, and are walked in the order of the first one.
+def _pick_element(v):
+    for item in v:
+        return item
+    raise IndexError("cannot pick an item of an empty set")
+
+
+class Set(BoxBase):
+    @classmethod
+    def __guess__(cls, v):
+        return Set
+
+    @classmethod
+    def __pick_element__(cls, v):
+        return _pick_element(v)
+
+
+class FrozenSet(BoxBase):
+    @classmethod
+    def __guess__(cls, v):
+        return FrozenSet
+
+    @classmethod
+    def __pick_element__(cls, v):
+        return _pick_element(v)
+
+
+for _Box, _name in [(Set, "set"), (FrozenSet, "frozenset")]:
+    _Box.Primitives.ISNOTA(f"({{VAL}}.__class__ is not {_name})")
+    _Box.Primitives.ISNOTA2(f"({{VAL}}.__class__ is not {_name} or {{VAL}} != {{PROOF}})")
+    _Box.Primitives.ISNOTA2_PROOF("{VAL}")
+    _Box.Primitives.ITER("{VAL}")
+    _Box.Primitives.ITER2("{PROOF}")
+    _Box.Primitives.ITER2_PROOF("tuple({VAL})")
+    _Box.Primitives.NEW_FROM_ITER(f"{_name}({{VAL}})")
+    _Box.Primitives.NEW(f"{_name}(({{VAL}},))")
+    _Box.Primitives.GET_DUMMY(f"{_name}()")
+    _Box.Primitives.PICK("next(iter({VAL}))")
+    _Box.Primitives.GET_LENGTH("len({VAL})")
+
+    # equal sets have equal lengths
+    _Box.Heuristics.SHAPE_IMPLIES_LENGTH(True)
+
+del _Box, _name
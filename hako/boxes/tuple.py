@@ -21,3 +21,4 @@ Tuple.Primitives.PICK("{VAL}[0]")
 Tuple.Primitives.GET_LENGTH("len({VAL})")
 
 Tuple.Heuristics.IS_NAIVE_ITERATOR(True)
+Tuple.Heuristics.IS_POSITIONAL(True)
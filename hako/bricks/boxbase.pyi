@@ -13,6 +13,8 @@ class BoxBase(metaclass=BoxBaseMeta):
     @classmethod
     def __pick_element__(cls, val): ...
     @classmethod
+    def __fingerprint__(cls, val): ...
+    @classmethod
     def __specialize__(cls, arg): ...
     @classmethod
     def __prepare_constants__(cls, mdata): ...
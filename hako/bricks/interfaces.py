@@ -2,6 +2,8 @@ PRIMITIVE_ENTRIES = (
     "ISNOTA",
     "ISNOTA2",
     "ISNOTA2_PROOF",
+    # the part of ISNOTA2 left once the indices of the proof are looked up
+    "ISNOTA_CLASS",
     "ITER",
     "ITER2",
     "ITER2_PROOF",
@@ -12,6 +14,8 @@ PRIMITIVE_ENTRIES = (
     "GET_INDICES",
     "GET_DUMMY",
     "GET_ITEM",
+    # a statement storing {ITEM} at {INDEX}, for mutable boxes only
+    "SET_ITEM",
     "PICK",
     "GET_LENGTH",
     "GET_LENGTH2",
@@ -68,6 +72,14 @@ PROOF_ENTRIES = [
 HEURISTIC_ENTRIES = [
     ["IS_NAIVE_ITERATOR", lambda: False],
     ["SHAPE_IMPLIES_LENGTH", lambda: False],
+    # consecutive levels of this box are axes of one array
+    ["IS_ARRAY_AXIS", lambda: False],
+    # items can only be consumed once, lengths are compared while zipping
+    ["IS_STREAM", lambda: False],
+    # items are addressed by keys rather than by positions
+    ["IS_KEYED", lambda: False],
+    # items are addressed by their positions, as given by `range(len(...))`
+    ["IS_POSITIONAL", lambda: False],
     ["_SAME_PROOF", set],
 ]
 
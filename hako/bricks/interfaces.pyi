@@ -9,6 +9,7 @@ class Primitives(dict):
     def ISNOTA(self, value: V) -> V: ...
     def ISNOTA2(self, value: V) -> V: ...
     def ISNOTA2_PROOF(self, value: V) -> V: ...
+    def ISNOTA_CLASS(self, value: V) -> V: ...
     def ITER(self, value: V) -> V: ...
     def ITER2(self, value: V) -> V: ...
     def ITER2_PROOF(self, value: V) -> V: ...
@@ -19,6 +20,7 @@ class Primitives(dict):
     def GET_INDICES(self, value: V) -> V: ...
     def GET_DUMMY(self, value: V) -> V: ...
     def GET_ITEM(self, value: V) -> V: ...
+    def SET_ITEM(self, value: V) -> V: ...
     def PICK(self, value: V) -> V: ...
     def GET_LENGTH(self, value: V) -> V: ...
     def GET_LENGTH2(self, value: V) -> V: ...
@@ -27,3 +29,7 @@ class Primitives(dict):
 class Heuristics(dict):
     def IS_NAIVE_ITERATOR(self, value: V) -> None: ...
     def SHAPE_IMPLIES_LENGTH(self, value: V) -> None: ...
+    def IS_ARRAY_AXIS(self, value: V) -> None: ...
+    def IS_STREAM(self, value: V) -> None: ...
+    def IS_KEYED(self, value: V) -> None: ...
+    def IS_POSITIONAL(self, value: V) -> None: ...
@@ -101,29 +101,60 @@ def create_hierarchy_nocheck(obj):
     return tuple(map(ShapeNode.new, obj))
 
 
+def _boxtype_of(val):
+    boxtype = CLASS2BOXTYPE_MAPPING.get(val.__class__)
+    if boxtype is None:
+        raise ValueError(f"cannot guess the box of {val.__class__.__name__!r}")
+    return boxtype
+
+
+def _first_path(val, partial_hier: t.Optional[PartialHierarchy], depth: t.Optional[int]):
+    # `(node, boxtype, val)` at each level of the first path through `val`
+    if depth is not None:
+        partial_hier = (SHAPENODE_PLACEHOLDER,) * depth
+    elif partial_hier is None:
+        raise TypeError("expect either hier or depth to be given")
+
+    last = len(partial_hier) - 1
+    for level, node in enumerate(partial_hier):
+        boxtype = _boxtype_of(val) if node.is_placeholder else node.orig_boxtype
+        yield node, boxtype, val
+        if level != last:
+            val = boxtype.__pick_element__(val)
+
+
 def guess_hierarchy(
     val,
-    partial_hier: PartialHierarchy,
+    partial_hier: t.Optional[PartialHierarchy],
     depth: t.Optional[int],
 ) -> Hierarchy:
     hier = []
-    if depth is not None:
-        while depth > 0:
-            class_ = val.__class__
-            if class_ not in CLASS2BOXTYPE_MAPPING:
-                raise ValueError
-            boxtype = CLASS2BOXTYPE_MAPPING[class_]
-            node = boxtype.__guess__(val)
-            val = boxtype.__pick_element__(val)
-            depth -= 1
-            hier.append(node)
-    else:
-        for node in partial_hier:
-            if node.is_placeholder:
-                class_ = val.__class__
-                if class_ not in CLASS2BOXTYPE_MAPPING:
-                    raise ValueError
-                boxtype = CLASS2BOXTYPE_MAPPING[class_]
-                node = boxtype.__guess__(val)._replace(target=node.target)
-            val = boxtype.__pick_element__(val)
+    for node, boxtype, val in _first_path(val, partial_hier, depth):
+        if node.is_placeholder:
+            guessed = ShapeNode.new(boxtype.__guess__(val))
+            node = guessed._replace(target=node.target)
+        hier.append(node)
     return tuple(hier)
+
+
+def fingerprint_hierarchy(
+    val,
+    partial_hier: t.Optional[PartialHierarchy],
+    depth: t.Optional[int],
+) -> tuple:
+    # everything `guess_hierarchy` depends on, but cheaper to get and to hash
+    if depth is None:
+        return tuple(
+            (val.__class__, boxtype.__fingerprint__(val))
+            for node, boxtype, val in _first_path(val, partial_hier, depth)
+            if node.is_placeholder
+        )
+
+    fingerprint = []
+    for level in range(depth):
+        if level:
+            val = boxtype.__pick_element__(val)
+        class_ = val.__class__
+        boxtype = _boxtype_of(val)
+        fingerprint.append((class_, boxtype.__fingerprint__(val)))
+    return tuple(fingerprint)
@@ -1,6 +1,9 @@
 import typing as t
 
-import random
+import threading
+
+from hako import flags
+from hako.misc import instrument, profiling
 
 from .grocery import SnippetGrocery
 from .magic import make_func
@@ -14,14 +17,26 @@ DstSymbol = Symbol
 SymbolAliasMapping = t.Mapping[DstSymbol, SrcSymbol]
 
 
+# Builders and symbol holders are created per generated function and must not
+# be shared across threads. With HAKO_DEBUG set, any cross-thread use raises.
+def _check_owner(obj) -> None:
+    if obj._owner != threading.get_ident():
+        raise RuntimeError(f"{obj.__class__.__name__} used outside its owner thread")
+
+
 class SymbolHolder:
-    __slots__ = "_dict", "_var_counter"
+    __slots__ = "_dict", "_packs", "_var_counter", "_sym_counter", "_owner"
 
     def __init__(self, s2vn: Symbol2VariableNameMapping) -> None:
         self._dict = s2vn
+        self._packs: t.Dict[VariableName, t.List[VariableName]] = {}
         self._var_counter = 0
+        self._sym_counter = 0
+        self._owner = threading.get_ident()
 
     def _new_variable_name(self) -> VariableName:
+        if flags.DEBUG:
+            _check_owner(self)
         varname = f"X{self._var_counter}"
         self._var_counter += 1
         return varname
@@ -47,8 +62,10 @@ class SymbolHolder:
         for dst, src in mapping.items():
             self._dict[dst] = self._dict[src]
 
-    def NewSymbol(self, *, getrandbits=random.getrandbits) -> Symbol:
-        return f"SYM_{getrandbits(32)}"
+    def NewSymbol(self) -> Symbol:
+        sym = f"SYM_{self._sym_counter}"
+        self._sym_counter += 1
+        return sym
 
     def NewDefinedSymbol(self) -> Symbol:
         sym = self.NewSymbol()
@@ -58,11 +75,32 @@ class SymbolHolder:
     def SymbolDefined(self, sym: Symbol) -> bool:
         return sym in self._dict
 
+    # A pack stands for a tuple of variables without building it: `{sym}`
+    # reads as a tuple display, `Star` and `Item` give its items as they are.
+    # Other symbols aliased to `sym` are packs as well.
+    def Pack(self, sym: Symbol, names: t.List[VariableName]) -> None:
+        display = f"({', '.join(names)},)"
+        self._dict[sym] = display
+        self._packs[display] = names
+
+    def Unpacked(self, sym: Symbol) -> t.Optional[t.List[VariableName]]:
+        return self._packs.get(self._dict[sym])
+
+    def Star(self, sym: Symbol) -> str:
+        # in place of `*{sym}` among the arguments of a call
+        names = self.Unpacked(sym)
+        return ", ".join(names) if names is not None else f"*{self._dict[sym]}"
+
+    def Item(self, sym: Symbol, index: int) -> str:
+        names = self.Unpacked(sym)
+        return names[index] if names is not None else f"{self._dict[sym]}[{index}]"
+
 
 class CodeBuilder:
     def __init__(self, *param_spec: t.List[str]) -> None:
         self._indent_level = 2
         self._codes = []
+        self._owner = threading.get_ident()
 
         self._s2vn: Symbol2VariableNameMapping = {
             "CODE_INDENT_1": CODE_INDENT_1,
@@ -77,13 +115,25 @@ class CodeBuilder:
         for sym in param_spec[0]:
             parameters.append(ST.Define(sym))
         vararg = param_spec[1]
-        if vararg:
+        if vararg.__class__ is tuple:
+            # `(sym, n)` takes exactly n positional arguments, as a pack
+            vararg, arity = vararg
+            packed = [ST._new_variable_name() for _ in range(arity)]
+            parameters.extend(packed)
+            ST.Pack(vararg, packed)
+        elif vararg:
             parameters.append("*" + ST.Define(vararg))
         kwarg = param_spec[2]
         if kwarg:
             parameters.append("*" + ST.Define(kwarg))
         self._parameters = ", ".join(parameters)
 
+        if profiling.ENABLED:
+            self._profile_loops = []
+            self._profile_counts = ST.NewDefinedSymbol()
+        else:
+            self._profile_loops = None
+
     def Setup(self, hier) -> t.Tuple[t.Sequence[SnippetGrocery], SymbolHolder]:
         groceries: t.Sequence[SnippetGrocery] = []
         for node in hier:
@@ -111,6 +161,8 @@ class CodeBuilder:
     def Push(self, snippet: str, **symbol_aliases: SrcSymbol):
         if not snippet:
             return
+        if flags.DEBUG:
+            _check_owner(self)
 
         s2vn = self._s2vn
         if symbol_aliases:
@@ -123,10 +175,40 @@ class CodeBuilder:
         snippet = snippet.format_map(s2vn)
         codes.extend([s2vn["NL"], snippet])
 
+        if (
+            self._profile_loops is not None
+            and snippet.startswith("for ")
+            and snippet.endswith(":")
+            and "\n" not in snippet
+        ):
+            index = len(self._profile_loops)
+            self._profile_loops.append(snippet)
+            counts = s2vn[self._profile_counts]
+            codes.extend([s2vn["NL"], f"{CODE_INDENT_1}{counts}[{index}] += 1"])
+
     def End(self, name) -> t.Callable:
-        return make_func(
+        if instrument.ENABLED:
+            instrument.mark_codegen_end()
+
+        profile = None
+        if self._profile_loops is not None:
+            build = instrument.current()
+            if build is not None:
+                profile = profiling.FuncProfile(
+                    build.operator, build.variant, build.hier, self._profile_loops
+                )
+                counts = profile.counts
+            else:
+                counts = [0] * len(self._profile_loops)
+            self.BindConstant(self._profile_counts, counts)
+
+        func = make_func(
             name,
             self._parameters,
             "".join(self._codes),
             self._constants,
         )
+        if profile is not None:
+            profiling.register(profile)
+            func = profiling.wrap(func, profile)
+        return func
@@ -0,0 +1,109 @@
+import os
+import sys
+import marshal
+import hashlib
+import tempfile
+import typing as t
+from types import CodeType
+from importlib.util import MAGIC_NUMBER
+
+from hako import flags
+
+FORMAT_VERSION = 1
+
+# code objects are only portable across interpreters sharing the bytecode magic
+_PYTHON_TAG = f"{sys.implementation.cache_tag}-{MAGIC_NUMBER.hex()}"
+_HEADER = f"hako-codecache-{FORMAT_VERSION}-{_PYTHON_TAG}\n".encode()
+
+_cache_dir: t.Optional[str] = flags.CACHE_DIR
+
+
+def set_cache_dir(path: t.Optional[str]) -> None:
+    global _cache_dir
+    _cache_dir = os.fspath(path) if path is not None else None
+
+
+def get_cache_dir() -> t.Optional[str]:
+    return _cache_dir
+
+
+def enabled() -> bool:
+    return _cache_dir is not None
+
+
+def make_key(name: str, source: str, optimized: bool = False) -> str:
+    digest = hashlib.sha256(_HEADER)
+    digest.update(name.encode())
+    digest.update(b"\0")
+    if optimized:
+        digest.update(b"optimized\0")
+    digest.update(source.encode())
+    return digest.hexdigest()
+
+
+def _path_of(key: str) -> str:
+    return os.path.join(_cache_dir, _PYTHON_TAG, f"{key}.marshal")
+
+
+def load(key: str) -> t.Optional[CodeType]:
+    try:
+        with open(_path_of(key), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    header = _HEADER + key.encode()
+    if not data.startswith(header):
+        return None
+    try:
+        code = marshal.loads(data[len(header) :])
+    except (EOFError, ValueError, TypeError):
+        return None
+    if code.__class__ is not CodeType:
+        return None
+    return code
+
+
+def store(key: str, code: CodeType) -> None:
+    path = _path_of(key)
+    directory = os.path.dirname(path)
+    data = _HEADER + key.encode() + marshal.dumps(code)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError:
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # readers either see the old entry, no entry, or the complete new one
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def retarget(code: CodeType, filename: str) -> CodeType:
+    consts = tuple(
+        retarget(const, filename) if const.__class__ is CodeType else const
+        for const in code.co_consts
+    )
+    return code.replace(co_filename=filename, co_consts=consts)
+
+
+def clear() -> None:
+    if _cache_dir is None:
+        return
+    directory = os.path.join(_cache_dir, _PYTHON_TAG)
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            os.unlink(os.path.join(directory, entry))
+        except OSError:
+            pass
@@ -23,10 +23,12 @@ class SnippetGrocery:
         self.TargetGrocery = SnippetGrocery(target, CB) if self.HasTarget else None
 
         self.DEFINED_ISNOTA2 = Primitives["ISNOTA2"] is not None
+        self.DEFINED_ISNOTA_CLASS = Primitives["ISNOTA_CLASS"] is not None
         self.DEFINED_ITER2 = Primitives["ITER2"] is not None
         self.DEFINED_NEW_FROM_ITER2 = Primitives["NEW_FROM_ITER2"] is not None
         self.DEFINED_GET_LENGTH = Primitives["GET_LENGTH"] is not None
         self.DEFINED_GET_LENGTH2 = Primitives["GET_LENGTH2"] is not None
+        self.DEFINED_SET_ITEM = Primitives["SET_ITEM"] is not None
 
         self.SYM_INDICES = ST.NewSymbol()
         self.SYM_LENGTH_REF = ST.NewSymbol()
@@ -71,7 +73,7 @@ class SnippetGrocery:
             return self.CODE_GET_LENGTH()
 
     def CODE_LENGTH_MISMATCHED_AUTO(self) -> str:
-        if self.H_SHAPE_IMPLIES_LENGTH:
+        if self.H_SHAPE_IMPLIES_LENGTH or self.H_IS_STREAM:
             return "False"
 
         self.ST.Alias(self.SYM_GLPROOF, "PROOF")
@@ -99,8 +101,11 @@ class SnippetGrocery:
         return CODE_ITER
 
     def CODE_ITER2_ZIP_AUTO(self, VALS="VALS") -> str:
+        if self.H_IS_STREAM:
+            return f"zip_strict({self.ST.Star(VALS)})"
+
         if self.H_IS_NAIVE_ITERATOR:
-            return f"zip(*{{{VALS}}})"
+            return f"zip({self.ST.Star(VALS)})"
 
         if self.DEFINED_ITER2:
             self.ST.Alias(self.SYM_IPROOF, "PROOF")
@@ -108,6 +113,10 @@ class SnippetGrocery:
         else:
             CODE_ITER = self.CODE_ITER()
 
+        # the parameters of a pack are iterated one by one
+        names = self.ST.Unpacked(VALS)
+        if names is not None:
+            return f"zip({', '.join(CODE_ITER.replace('{VAL}', name) for name in names)})"
         return f"zip(*({CODE_ITER} for {{VAL}} in {{{VALS}}}))"
 
     def CODE_ISNOTA2_AUTO(self) -> str:
@@ -117,11 +126,18 @@ class SnippetGrocery:
         else:
             return self.CODE_ISNOTA()
 
+    # for checks followed by lookups of every index, see `ISNOTA_CLASS`
+    def CODE_ISNOTA_CLASS_AUTO(self) -> str:
+        if self.DEFINED_ISNOTA_CLASS:
+            return self.CODE_ISNOTA_CLASS()
+        return self.CODE_ISNOTA2_AUTO()
+
     def CODE_NEW_FROM_ITER2_AUTO(self) -> str:
         if self.HasTarget:
             self = self.TargetGrocery
 
-        if self.DEFINED_NEW_FROM_ITER2:
+        # boxes which also define NEW_FROM_ITER may be rebuilt without proof
+        if self.DEFINED_NEW_FROM_ITER2 and self.ST.SymbolDefined(self.SYM_NIPROOF):
             self.ST.Alias(self.SYM_NIPROOF, "PROOF")
             return self.CODE_NEW_FROM_ITER2()
         else:
@@ -138,6 +154,9 @@ class SnippetGrocery:
     def CODE_ISNOTA2_PROOF(self) -> str:
         ...
 
+    def CODE_ISNOTA_CLASS(self) -> str:
+        ...
+
     def CODE_ITER(self) -> str:
         ...
 
@@ -168,6 +187,9 @@ class SnippetGrocery:
     def CODE_GET_ITEM(self) -> str:
         ...
 
+    def CODE_SET_ITEM(self) -> str:
+        ...
+
     def CODE_PICK(self) -> str:
         ...
 
@@ -1,14 +1,21 @@
+import threading
 import typing as t
-from random import Random
+from time import perf_counter
+from contextlib import contextmanager
+from collections import namedtuple
 from linecache import lazycache
 
-from hako.misc.functional import zip_strict
+from hako.misc.functional import repr_value, zip_strict
+from hako.misc import instrument
 from hako.misc.exceptions import BoxMismatched
 
+from . import diskcache, optimizer, sourcedump
+from .sourcedump import source_digest
 from .snippets import *
 
 _BUILTIN_CONSTANTS: t.Dict[str, t.Any] = dict(
     zip_strict=zip_strict,
+    repr_value=repr_value,
     len=len,
     zip=zip,
     map=map,
@@ -16,6 +23,8 @@ _BUILTIN_CONSTANTS: t.Dict[str, t.Any] = dict(
     tuple=tuple,
     list=list,
     dict=dict,
+    set=set,
+    frozenset=frozenset,
     range=range,
     next=next,
     all=all,
@@ -26,8 +35,12 @@ _BUILTIN_CONSTANTS: t.Dict[str, t.Any] = dict(
 )
 
 
+_constants_lock = threading.Lock()
+
+
 def register_constants(**ldict: dict):
-    _BUILTIN_CONSTANTS.update(ldict)
+    with _constants_lock:
+        _BUILTIN_CONSTANTS.update(ldict)
 
 
 class _FakeLoader:
@@ -40,11 +53,30 @@ class _FakeLoader:
         return self.lines
 
 
-getrandbits = Random(42).getrandbits
+GeneratedFunc = namedtuple("GeneratedFunc", "func name func_sig func_body constants")
+
+_captures: t.List[t.List[GeneratedFunc]] = []
+
+
+@contextmanager
+def capture_generated():
+    captured = []
+    _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        _captures.remove(captured)
+
+
+def _compile(source: str, filename: str, optimized: bool):
+    # the optimized tree keeps the line numbers of `source`, which is what
+    # linecache serves for tracebacks either way
+    return compile(optimizer.optimize(source) if optimized else source, filename, "exec")
 
 
 def make_func(name, func_sig, func_body, constants):
-    constants.update(_BUILTIN_CONSTANTS)
+    with _constants_lock:
+        constants.update(_BUILTIN_CONSTANTS)
     wrapper_sig = ", ".join(f"{name}={name}" for name in constants)
     source = (
         f"def __WRAPPER__({wrapper_sig}):\n"
@@ -52,9 +84,75 @@ def make_func(name, func_sig, func_body, constants):
         f"{func_body}\n"
         f"{CODE_INDENT_1}return {name}"
     )
-    filename = f"hako::codegen::{getrandbits(32):08x}"
-    lazycache(filename, {"__name__": filename, "__loader__": _FakeLoader(source)})
+    if sourcedump.ENABLED:
+        filename = sourcedump.write(name, source)
+    else:
+        # identical sources share one name, and with it one linecache entry
+        filename = f"hako::codegen::{source_digest(source)[:12]}"
+        lazycache(filename, {"__name__": filename, "__loader__": _FakeLoader(source)})
+
+    instrumented = instrument.ENABLED
+    if instrumented:
+        started = perf_counter()
+
+    optimized = optimizer.ENABLED
+    if diskcache.enabled():
+        key = diskcache.make_key(name, source, optimized)
+        code = diskcache.load(key)
+        if code is None:
+            code = _compile(source, filename, optimized)
+            diskcache.store(key, code)
+        elif code.co_filename != filename:
+            code = diskcache.retarget(code, filename)
+    else:
+        code = _compile(source, filename, optimized)
+
+    if instrumented:
+        instrument.record_compile(source, perf_counter() - started)
+    if _captures:
+        bindings = dict(constants)
 
-    code = compile(source, filename, "exec")
     exec(code, constants)
-    return constants["__WRAPPER__"]()
+    func = constants["__WRAPPER__"]()
+    func.__hako_source__ = (name, func_sig, func_body)
+
+    if _captures:
+        generated = GeneratedFunc(func, name, func_sig, func_body, bindings)
+        for captured in _captures:
+            captured.append(generated)
+    return func
+
+
+# Passed for the last parameter of a function made by `make_arity_guarded`
+# when the call has fewer arguments.
+SPILL = object()
+
+
+# A copy of the generated `func` which also takes fewer or more positional
+# arguments, such calls being handed over to `fallback` with SPILL in place
+# of the missing last one. Returns None for functions whose source is not at
+# hand, such as prebuilt or profiled ones.
+def make_arity_guarded(func: t.Callable, fallback: t.Callable) -> t.Optional[t.Callable]:
+    source = getattr(func, "__hako_source__", None)
+    # profiled functions carry the source of the function they wrap
+    if source is None or hasattr(func, "__wrapped__"):
+        return None
+    name, func_sig, func_body = source
+    params = func_sig.split(", ") if func_sig else []
+    if not params or any(not param.isidentifier() for param in params):
+        return None
+
+    last = params[-1]
+    guard = (
+        f"\n{CODE_INDENT_2}if {last} is __SPILL__ or __SPILLED__:"
+        f"\n{CODE_INDENT_2}{CODE_INDENT_1}return __FALLBACK__({func_sig}, *__SPILLED__)"
+    )
+    constants = dict(func.__globals__)
+    del constants["__WRAPPER__"]
+    constants.update(__SPILL__=SPILL, __FALLBACK__=fallback)
+    return make_func(
+        name,
+        ", ".join([*params[:-1], f"{last}=__SPILL__", "*__SPILLED__"]),
+        guard + func_body,
+        constants,
+    )
@@ -0,0 +1,300 @@
+import ast
+import typing as t
+
+from hako import flags
+
+__all__ = ["enable", "disable", "optimize"]
+
+# rewrites the generated source before it is compiled, see `optimize`
+ENABLED = flags.OPTIMIZE
+
+
+def enable() -> None:
+    global ENABLED
+    ENABLED = True
+
+
+def disable() -> None:
+    global ENABLED
+    ENABLED = False
+
+
+def _is_constant(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant)
+
+
+def _truth(node: ast.AST) -> t.Optional[bool]:
+    if _is_constant(node):
+        return bool(node.value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        truth = _truth(node.operand)
+        return None if truth is None else not truth
+    return None
+
+
+def _block(stmts: t.List[ast.stmt], anchor: ast.AST) -> t.List[ast.stmt]:
+    return stmts or [ast.copy_location(ast.Pass(), anchor)]
+
+
+class _FoldConstants(ast.NodeTransformer):
+    # `if False: ...` and friends, as emitted by the heuristics of the boxes
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.AST:
+        self.generic_visit(node)
+        # only the operands in front can be dropped without changing the value
+        # of the expression, `x and True` is `x` only in a boolean context
+        absorbing = isinstance(node.op, ast.Or)
+        values = list(node.values)
+        while len(values) > 1:
+            truth = _truth(values[0])
+            if truth is None:
+                break
+            if truth is absorbing:
+                return values[0]
+            values.pop(0)
+        if len(values) == 1:
+            return values[0]
+        node.values = values
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            truth = _truth(node.operand)
+            if truth is not None:
+                return ast.copy_location(ast.Constant(value=not truth), node)
+        return node
+
+    def visit_If(self, node: ast.If) -> t.Union[ast.AST, t.List[ast.stmt]]:
+        self.generic_visit(node)
+        truth = _truth(node.test)
+        if truth is None:
+            return node
+        return node.body if truth else node.orelse
+
+    def visit_While(self, node: ast.While) -> t.Union[ast.AST, t.List[ast.stmt]]:
+        self.generic_visit(node)
+        if _truth(node.test) is False:
+            return node.orelse
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        super().generic_visit(node)
+        # a folded branch may leave a block without any statement
+        if isinstance(getattr(node, "body", None), list):
+            node.body = _block(node.body, node)
+        return node
+
+
+def _count_name(node: ast.AST, name: str) -> int:
+    return sum(
+        1
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and child.id == name
+    )
+
+
+def _single_name_target(node: ast.stmt) -> t.Optional[str]:
+    if (
+        isinstance(node, ast.Assign)
+        and len(node.targets) == 1
+        and isinstance(node.targets[0], ast.Name)
+    ):
+        return node.targets[0].id
+    return None
+
+
+def _chain_base(node: ast.AST) -> t.Optional[ast.AST]:
+    # the sub-expression evaluated first in `A[i].x[j]`, i.e. `A`
+    while isinstance(node, (ast.Subscript, ast.Attribute)):
+        node = node.value
+    return node
+
+
+class _ChainAssignments(ast.NodeTransformer):
+    # `V = A[i]` followed by `V = V[j]` becomes `V = A[i][j]`
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        super().generic_visit(node)
+        for field in ("body", "orelse", "finalbody"):
+            stmts = getattr(node, field, None)
+            if isinstance(stmts, list) and stmts and isinstance(stmts[0], ast.stmt):
+                setattr(node, field, self._chain(stmts))
+        return node
+
+    @staticmethod
+    def _chain(stmts: t.List[ast.stmt]) -> t.List[ast.stmt]:
+        chained: t.List[ast.stmt] = []
+        for stmt in stmts:
+            name = _single_name_target(stmt)
+            previous = chained[-1] if chained else None
+            if (
+                name is not None
+                and previous is not None
+                and _single_name_target(previous) == name
+                and isinstance(stmt.value, (ast.Subscript, ast.Attribute))
+                and _count_name(stmt.value, name) == 1
+                and _count_name(previous.value, name) == 0
+            ):
+                base = _chain_base(stmt.value)
+                if isinstance(base, ast.Name) and base.id == name:
+                    # substitute the only (and first evaluated) use of `name`
+                    parent = stmt.value
+                    while parent.value is not base:
+                        parent = parent.value
+                    parent.value = previous.value
+                    previous.value = stmt.value
+                    continue
+            chained.append(stmt)
+        return chained
+
+
+def _is_pure(node: ast.AST) -> bool:
+    if isinstance(node, (ast.Constant, ast.Name, ast.Lambda)):
+        return True
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return all(map(_is_pure, node.elts))
+    return False
+
+
+class _EliminateDeadStores(ast.NodeTransformer):
+    # drops assignments of side-effect free values to names that are never
+    # read, the generated names being unique there is no shadowing to handle
+
+    def __init__(self, loaded: t.Set[str]) -> None:
+        self.loaded = loaded
+        self.changed = False
+
+    def visit_Assign(self, node: ast.Assign) -> t.Optional[ast.AST]:
+        name = _single_name_target(node)
+        if name is not None and name not in self.loaded and _is_pure(node.value):
+            self.changed = True
+            return None
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        super().generic_visit(node)
+        if isinstance(getattr(node, "body", None), list):
+            node.body = _block(node.body, node)
+        return node
+
+
+def _loaded_names(tree: ast.AST) -> t.Set[str]:
+    loaded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Store):
+            loaded.add(node.id)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            loaded.update(node.names)
+    return loaded
+
+
+_BUILDERS = (ast.List, ast.Set, ast.Dict, ast.ListComp, ast.SetComp, ast.DictComp)
+_LOOPS = (ast.For, ast.While, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+def _stored_counts(tree: ast.AST) -> t.Dict[str, int]:
+    counts: t.Dict[str, int] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            name = node.id
+        elif isinstance(node, ast.arg):
+            name = node.arg
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            name = node.name
+        else:
+            continue
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def _looped_method_calls(tree: ast.AST) -> t.Iterator[ast.Call]:
+    # `NAME.method(...)` calls run by a loop, however deep
+    for loop in ast.walk(tree):
+        if isinstance(loop, _LOOPS):
+            for node in ast.walk(loop):
+                if (
+                    isinstance(node, ast.Call)
+                    and isinstance(node.func, ast.Attribute)
+                    and isinstance(node.func.value, ast.Name)
+                ):
+                    yield node
+
+
+class _CacheBoundMethods(ast.NodeTransformer):
+    # `V = []` then `V.append(x)` in a loop becomes `V_append = V.append`
+    # right after the assignment and `V_append(x)` in the loop. Only names
+    # assigned once, from a builder display, are concerned: the lookup cannot
+    # fail on them nor be changed afterwards, so it needs no guard whether
+    # the loop runs or not.
+
+    def __init__(self, tree: ast.AST) -> None:
+        counts = _stored_counts(tree)
+        builders = {
+            name
+            for node in ast.walk(tree)
+            for name in [_single_name_target(node)]
+            if name is not None and counts[name] == 1 and isinstance(node.value, _BUILDERS)
+        }
+        taken = set(counts) | _loaded_names(tree)
+        self.cached: t.Dict[t.Tuple[str, str], str] = {}
+        self.calls: t.Dict[int, str] = {}
+        for call in _looped_method_calls(tree):
+            key = (call.func.value.id, call.func.attr)
+            if key[0] not in builders or key[1].startswith("__"):
+                continue
+            if key not in self.cached:
+                cached = f"{key[0]}_{key[1]}"
+                while cached in taken:
+                    cached += "_"
+                taken.add(cached)
+                self.cached[key] = cached
+            self.calls[id(call)] = self.cached[key]
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        cached = self.calls.get(id(node))
+        if cached is not None:
+            node.func = ast.copy_location(ast.Name(id=cached, ctx=ast.Load()), node.func)
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        super().generic_visit(node)
+        for field in ("body", "orelse", "finalbody"):
+            stmts = getattr(node, field, None)
+            if isinstance(stmts, list) and stmts and isinstance(stmts[0], ast.stmt):
+                setattr(node, field, self._bind(stmts))
+        return node
+
+    def _bind(self, stmts: t.List[ast.stmt]) -> t.List[ast.stmt]:
+        bound: t.List[ast.stmt] = []
+        for stmt in stmts:
+            bound.append(stmt)
+            name = _single_name_target(stmt)
+            for (owner, attr), cached in self.cached.items():
+                if owner == name:
+                    lookup = ast.Attribute(
+                        value=ast.Name(id=owner, ctx=ast.Load()), attr=attr, ctx=ast.Load()
+                    )
+                    assign = ast.Assign(
+                        targets=[ast.Name(id=cached, ctx=ast.Store())], value=lookup
+                    )
+                    bound.append(ast.copy_location(assign, stmt))
+        return bound
+
+
+def optimize(source: str) -> ast.Module:
+    tree = ast.parse(source)
+    tree = _FoldConstants().visit(tree)
+    tree = _ChainAssignments().visit(tree)
+    while True:
+        eliminate = _EliminateDeadStores(_loaded_names(tree))
+        tree = eliminate.visit(tree)
+        if not eliminate.changed:
+            break
+    tree = _CacheBoundMethods(tree).visit(tree)
+    # other loop invariants are not hoisted: loops may run zero times, in
+    # which case a hoisted subscript or attribute lookup raises where they
+    # would not, and the loops of generated code call or yield to user code,
+    # which may change what they read
+    return ast.fix_missing_locations(tree)
@@ -0,0 +1,88 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import typing as t
+
+from hako import flags
+from hako.misc import instrument
+
+INDEX_FILENAME = "index.jsonl"
+
+_dump_dir: t.Optional[str] = flags.DUMP_DIR
+ENABLED = _dump_dir is not None
+
+
+def set_dump_dir(path: t.Optional[str]) -> None:
+    global _dump_dir, ENABLED
+    _dump_dir = os.path.abspath(os.fspath(path)) if path is not None else None
+    ENABLED = _dump_dir is not None
+
+
+def get_dump_dir() -> t.Optional[str]:
+    return _dump_dir
+
+
+def source_digest(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def _slugify(text: str, limit: int = 80) -> str:
+    text = re.sub(r"\[None\]", "", text)
+    text = re.sub(r"[^0-9A-Za-z]+", "_", text).strip("_")
+    return text[:limit]
+
+
+def _write_atomic(path: str, data: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# Writes `source` into the dump directory under a name derived from the
+# enclosing build and the source itself, and returns its path.
+def write(name: str, source: str) -> str:
+    build = instrument.current()
+    digest = source_digest(source)[:12]
+    if build is not None:
+        variant = build.variant.replace("build_func", "")
+        stem = f"{build.operator}{variant}-{_slugify(repr(build.hier))}-{digest}"
+        entry = dict(
+            operator=build.operator,
+            variant=build.variant,
+            hier=repr(build.hier),
+            options=repr(build.args),
+        )
+    else:
+        stem = f"{name}-{digest}"
+        entry = dict(operator=name, variant=None, hier=None, options=None)
+
+    directory = _dump_dir
+    path = os.path.join(directory, f"{stem}.py")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    _write_atomic(path, source)
+
+    entry = dict(file=os.path.basename(path), function=name, **entry)
+    line = json.dumps(entry) + "\n"
+    fd = os.open(
+        os.path.join(directory, INDEX_FILENAME),
+        os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+        0o644,
+    )
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+    return path
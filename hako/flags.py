@@ -1,3 +1,10 @@
 import os
 
 DEBUG = os.getenv("HAKO_DEBUG") is not None
+CACHE_DIR = os.getenv("HAKO_CACHE_DIR") or None
+AOT_MODULES = [x for x in os.getenv("HAKO_AOT_MODULE", "").split(",") if x]
+OPERATOR_CACHE_SIZE = int(os.getenv("HAKO_OPERATOR_CACHE_SIZE", "1024")) or None
+STATS = os.getenv("HAKO_STATS") is not None
+PROFILE = os.getenv("HAKO_PROFILE") or None
+DUMP_DIR = os.getenv("HAKO_DUMP_DIR") or None
+OPTIMIZE = os.getenv("HAKO_OPTIMIZE") is not None
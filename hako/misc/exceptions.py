@@ -1,2 +1,8 @@
 class BoxMismatched(Exception):
     ...
+
+
+# raised when an operator is built over a box which cannot support it, e.g.
+# rebuilding records from some of their fields only
+class BoxUnsupported(TypeError):
+    ...
@@ -1,8 +1,17 @@
 import typing as t
 
+from .exceptions import BoxMismatched
+
 R = t.TypeVar("R")
 
 
+# Values are described in error messages of generated code through this
+# function, whose frame has the usual builtins: reprs may import modules,
+# e.g. numpy loads its formatters the first time an array is printed.
+def repr_value(value) -> str:
+    return repr(value)
+
+
 def zip_strict(*iterables):
     if not iterables:
         return
@@ -15,10 +24,12 @@ def zip_strict(*iterables):
             yield tuple(items)
     except StopIteration:
         pass
+    # the 0-th iterable is the reference, as for the length checks of boxes
+    # whose length is known upfront
     if items:
         i = len(items)
-        raise ValueError(i, i - 1, "shorter")
+        raise BoxMismatched(f"{i}-th ARG has different length than 0-th ARG (shorter)")
     sentinel = object()
     for i, iterator in enumerate(iterators[1:], 1):
         if next(iterator, sentinel) is not sentinel:
-            raise ValueError(i, i - 1, "longer")
+            raise BoxMismatched(f"{i}-th ARG has different length than 0-th ARG (longer)")
@@ -0,0 +1,165 @@
+import ast
+import threading
+import typing as t
+from time import perf_counter
+from collections import deque, namedtuple
+
+from hako import flags
+
+__all__ = ["BuildRecord", "enable", "disable", "stats", "reset"]
+
+BuildRecord = namedtuple(
+    "BuildRecord",
+    [
+        "operator",
+        "variant",
+        "hier",
+        "codegen_time",
+        "compile_time",
+        "source_length",
+        "loops",
+        "loop_depth",
+    ],
+)
+
+# checked by the (cold) build paths only, so disabled instrumentation costs a
+# global lookup per build and nothing per call
+ENABLED = flags.STATS
+
+# only the latest records are kept, so that long running processes do not
+# grow with every build
+MAX_RECORDS = 10000
+
+_records: t.Deque[BuildRecord] = deque(maxlen=MAX_RECORDS)
+_records_lock = threading.Lock()
+_callback: t.Optional[t.Callable[[BuildRecord], None]] = None
+_local = threading.local()
+
+
+def enable(callback: t.Optional[t.Callable[[BuildRecord], None]] = None) -> None:
+    global ENABLED, _callback
+    _callback = callback
+    ENABLED = True
+
+
+def disable() -> None:
+    global ENABLED, _callback
+    ENABLED = False
+    _callback = None
+
+
+def stats() -> t.List[BuildRecord]:
+    with _records_lock:
+        return list(_records)
+
+
+def reset() -> None:
+    with _records_lock:
+        _records.clear()
+
+
+class _Frame:
+    __slots__ = (
+        "operator",
+        "variant",
+        "hier",
+        "args",
+        "started",
+        "codegen_end",
+        "compile_time",
+        "source_length",
+        "loops",
+        "loop_depth",
+    )
+
+    def __init__(self, operator: str, variant: str, hier, args: tuple) -> None:
+        self.operator = operator
+        self.variant = variant
+        self.hier = hier
+        self.args = args
+        self.started = perf_counter()
+        self.codegen_end = None
+        self.compile_time = 0.0
+        self.source_length = 0
+        self.loops = 0
+        self.loop_depth = 0
+
+
+def _frames() -> t.List[_Frame]:
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def current() -> t.Optional[_Frame]:
+    frames = _frames()
+    return frames[-1] if frames else None
+
+
+# Runs `build_func` inside a build frame, which `current()` exposes to code
+# generation, e.g. for profiling. A record is only kept when ENABLED.
+def build(operator: str, variant: str, build_func: t.Callable, hier, args: tuple):
+    frames = _frames()
+    frame = _Frame(operator, variant, hier, args)
+    frames.append(frame)
+    try:
+        func = build_func(hier, *args)
+    finally:
+        frames.pop()
+
+    if not ENABLED:
+        return func
+
+    if frame.codegen_end is not None:
+        codegen_time = frame.codegen_end - frame.started
+    else:
+        codegen_time = perf_counter() - frame.started - frame.compile_time
+    record = BuildRecord(
+        operator,
+        variant,
+        hier,
+        codegen_time=codegen_time,
+        compile_time=frame.compile_time,
+        source_length=frame.source_length,
+        loops=frame.loops,
+        loop_depth=frame.loop_depth,
+    )
+    with _records_lock:
+        _records.append(record)
+    callback = _callback
+    if callback is not None:
+        callback(record)
+    return func
+
+
+def mark_codegen_end() -> None:
+    frames = _frames()
+    if frames:
+        frames[-1].codegen_end = perf_counter()
+
+
+def _count_loops(source: str) -> t.Tuple[int, int]:
+    loops = 0
+    max_depth = 0
+    stack = [(ast.parse(source), 0)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, (ast.For, ast.While, ast.comprehension)):
+            loops += 1
+            depth += 1
+            max_depth = max(max_depth, depth)
+        stack.extend((child, depth) for child in ast.iter_child_nodes(node))
+    return loops, max_depth
+
+
+def record_compile(source: str, compile_time: float) -> None:
+    frames = _frames()
+    if not frames:
+        return
+    frame = frames[-1]
+    frame.compile_time += compile_time
+    frame.source_length += len(source)
+    loops, loop_depth = _count_loops(source)
+    frame.loops += loops
+    frame.loop_depth = max(frame.loop_depth, loop_depth)
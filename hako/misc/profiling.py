@@ -0,0 +1,151 @@
+import os
+import json
+import atexit
+import functools
+import threading
+import typing as t
+from time import perf_counter
+from inspect import isgeneratorfunction
+
+from hako import flags
+
+__all__ = ["FuncProfile", "enable", "disable", "report", "reset", "dump", "merge"]
+
+# `HAKO_PROFILE=1` profiles functions generated from then on, any other value
+# is taken as a directory receiving a report when the process exits
+ENABLED = flags.PROFILE is not None
+
+_profiles: t.List["FuncProfile"] = []
+_profiles_lock = threading.Lock()
+
+
+class FuncProfile:
+    __slots__ = ("operator", "variant", "hier", "calls", "wall_time", "loops", "counts")
+
+    def __init__(self, operator: str, variant: str, hier, loops: t.List[str]) -> None:
+        self.operator = operator
+        self.variant = variant
+        self.hier = hier
+        self.calls = 0
+        self.wall_time = 0.0
+        self.loops = loops
+        # incremented by the generated code, once per iteration of each loop
+        self.counts = [0] * len(loops)
+
+    def as_dict(self) -> dict:
+        return dict(
+            operator=self.operator,
+            variant=self.variant,
+            hier=repr(self.hier),
+            calls=self.calls,
+            wall_time=self.wall_time,
+            loops=[
+                dict(index=index, source=source, count=count)
+                for index, (source, count) in enumerate(zip(self.loops, self.counts))
+            ],
+        )
+
+
+def enable() -> None:
+    global ENABLED
+    ENABLED = True
+
+
+def disable() -> None:
+    global ENABLED
+    ENABLED = False
+
+
+def register(profile: FuncProfile) -> None:
+    with _profiles_lock:
+        _profiles.append(profile)
+
+
+def wrap(func: t.Callable, profile: FuncProfile) -> t.Callable:
+    if isgeneratorfunction(func):
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            profile.calls += 1
+            gen = func(*args, **kwargs)
+            while True:
+                started = perf_counter()
+                try:
+                    item = next(gen)
+                except StopIteration:
+                    profile.wall_time += perf_counter() - started
+                    return
+                profile.wall_time += perf_counter() - started
+                yield item
+
+    else:
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            profile.calls += 1
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.wall_time += perf_counter() - started
+
+    return profiled
+
+
+def report() -> dict:
+    with _profiles_lock:
+        functions = [profile.as_dict() for profile in _profiles]
+    return dict(pids=[os.getpid()], functions=_merge_functions(functions))
+
+
+def reset() -> None:
+    with _profiles_lock:
+        _profiles.clear()
+
+
+def _function_key(function: dict) -> tuple:
+    return (
+        function["operator"],
+        function["variant"],
+        function["hier"],
+        tuple(loop["source"] for loop in function["loops"]),
+    )
+
+
+def _merge_functions(functions: t.Iterable[dict]) -> t.List[dict]:
+    merged: t.Dict[tuple, dict] = {}
+    for function in functions:
+        key = _function_key(function)
+        if key not in merged:
+            merged[key] = json.loads(json.dumps(function))
+            continue
+        target = merged[key]
+        target["calls"] += function["calls"]
+        target["wall_time"] += function["wall_time"]
+        for loop, other in zip(target["loops"], function["loops"]):
+            loop["count"] += other["count"]
+    return sorted(merged.values(), key=lambda f: f["wall_time"], reverse=True)
+
+
+def merge(*reports: dict) -> dict:
+    return dict(
+        pids=sorted({pid for report in reports for pid in report["pids"]}),
+        functions=_merge_functions(f for report in reports for f in report["functions"]),
+    )
+
+
+def dump(path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+
+def _dump_at_exit(directory: str) -> None:
+    try:
+        os.makedirs(directory, exist_ok=True)
+        dump(os.path.join(directory, f"hako-profile-{os.getpid()}.json"))
+    except OSError:
+        pass
+
+
+if ENABLED and flags.PROFILE != "1":
+    atexit.register(_dump_at_exit, flags.PROFILE)
@@ -0,0 +1,66 @@
+import typing as t
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+__all__ = ["gather", "call_gathered"]
+
+
+# Leaves of one input in a single 1-D buffer of their common type. Numbers are
+# converted by numpy, which infers their dtype while copying them; leaves which
+# are not numbers, e.g. tuples, are kept as they are in an object array, as the
+# per-leaf call would see them. Without numpy, an `array` of ints or floats, or
+# the list itself.
+def gather(leaves: t.Iterable):
+    if leaves.__class__ is not tuple:  # columns of several inputs already are
+        leaves = list(leaves)
+    if np is not None:
+        try:
+            ret = np.asarray(leaves)
+        except ValueError:  # sequences of different lengths
+            ret = None
+        if ret is None or ret.ndim != 1 or ret.dtype.kind not in "biufc":
+            ret = np.fromiter(leaves, object, count=len(leaves))
+        return ret
+    kinds = set(map(type, leaves))
+    if kinds <= {int, float}:
+        try:
+            return array("q" if kinds == {int} else "d", leaves)
+        except OverflowError:  # ints beyond 64 bits
+            pass
+    return leaves
+
+
+def call_gathered(func: t.Callable, leaves: t.Iterable, ninputs: int, lazy: bool):
+    if lazy:
+        return _iter_gathered(func, leaves, ninputs)
+
+    if ninputs == 1:
+        batches = (gather(leaves),)
+    else:
+        columns = list(zip(*leaves)) or [()] * ninputs
+        batches = tuple(map(gather, columns))
+    count = len(batches[0])
+
+    ret = func(*batches)
+    try:
+        length = len(ret)
+    except TypeError:
+        length = None
+    if length != count:
+        raise ValueError(
+            f"vectorized function should return one value per leaf, "
+            f"expect {count} values, got {ret!r}"
+        )
+
+    # same values, and same container, as the per-leaf path
+    return ret.tolist() if hasattr(ret, "tolist") else list(ret)
+
+
+# nothing is walked before the first value is asked for, all leaves are then
+# gathered and FUNC is called at once
+def _iter_gathered(func: t.Callable, leaves: t.Iterable, ninputs: int):
+    yield from call_gathered(func, leaves, ninputs, False)
@@ -0,0 +1,80 @@
+import typing as t
+from collections.abc import Mapping, Sequence
+
+__all__ = ["TransposedSequence", "TransposedMapping", "make_view"]
+
+# Shared by all the views of one `transform(..., view=True)` call:
+#   value    the original value
+#   perm     the permuted levels, `perm[d]` being the level at depth `d`
+#   pos      the inverse of `perm`
+#   indices  the indices of each level, positions follow their order
+#   keyed    whether the result is a mapping at each depth
+#   news     the containers of the result at each depth, from their items
+#   gets     the item getters of each level
+Spec = t.Tuple[t.Any, tuple, tuple, tuple, tuple, tuple, tuple]
+
+
+class _TransposedView:
+    __slots__ = ("_spec", "_picked")
+
+    def __init__(self, spec: Spec, picked: tuple = ()) -> None:
+        self._spec = spec
+        # indices of the levels above, by depth
+        self._picked = picked
+
+    def _indices(self):
+        spec = self._spec
+        return spec[3][spec[1][len(self._picked)]]
+
+    def _item(self, index):
+        value, perm, pos, _, keyed, _, gets = self._spec
+        picked = self._picked + (index,)
+        if len(picked) < len(perm):
+            return make_view(self._spec, picked)
+        # every permuted level is known, items are picked in the original order
+        for level, get in enumerate(gets):
+            value = get(value, picked[pos[level]])
+        return value
+
+    def __len__(self) -> int:
+        return len(self._indices())
+
+    def materialize(self):
+        items = map(self._item, self._indices())
+        depth = len(self._picked)
+        if depth + 1 < len(self._spec[1]):
+            items = (item.materialize() for item in items)
+        return self._spec[5][depth](items)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.materialize()!r})"
+
+
+class TransposedSequence(_TransposedView, Sequence):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key.__class__ is slice:
+            return [self._item(index) for index in self._indices()[key]]
+        return self._item(self._indices()[key])
+
+    def __iter__(self):
+        return map(self._item, self._indices())
+
+
+class TransposedMapping(_TransposedView, Mapping):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self._indices():
+            raise KeyError(key)
+        return self._item(key)
+
+    def __iter__(self):
+        return iter(self._indices())
+
+
+def make_view(spec: Spec, picked: tuple = ()) -> _TransposedView:
+    if spec[4][len(picked)]:
+        return TransposedMapping(spec, picked)
+    return TransposedSequence(spec, picked)
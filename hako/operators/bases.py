@@ -1,11 +1,13 @@
 import re
 import sys
 from textwrap import dedent
-from typing import Callable
+from typing import Callable, Dict, List
 
 from hako.codegen.snippets import CODE_INDENT_1
-from hako.codegen.magic import make_func
-from hako.bricks.shaping import guess_hierarchy, create_hierarchy
+from hako.codegen import sourcedump
+from hako.codegen.magic import SPILL, make_arity_guarded, make_func
+from hako.bricks.shaping import guess_hierarchy, fingerprint_hierarchy, create_hierarchy
+from hako.misc import instrument, profiling
 from . import cachelib
 
 
@@ -22,6 +24,15 @@ def reindent(code: str, level: int, strip: bool = True):
     return code_new
 
 
+OPERATORS: Dict[str, Callable] = {}
+
+# distinct guessed hierarchies remembered by each function guessing them
+INLINE_CACHE_SIZE = 8
+
+# callbacks invoked as `hook(prebuilt_key, func)` whenever a function is built
+BUILD_HOOKS: List[Callable] = []
+
+
 class OperatorBase:
     def __init__(
         self,
@@ -42,6 +53,8 @@ class OperatorBase:
         self._extra_constants = extra_constants or {}
 
         self._pre_check = pre_check_snip
+        # operator arguments only affecting which function gets built
+        self._extra_cache_key_args = []
         self.__post_init__(kwargs)
 
     def _snip_get_func(self):
@@ -52,6 +65,7 @@ class OperatorBase:
         if self._guessable:
             entries.append("depth")
         entries.append(self._extra_operator_args)
+        entries.extend(self._extra_cache_key_args)
         return f'({self._name!r}, {", ".join(entries)})'
 
     def _snip_body(self):
@@ -72,22 +86,43 @@ class OperatorBase:
             if hit:
                 return hit
 
-            if determined:
-                {{get_func_level_1}}
-            else:
-                def func_ret(*args):
-                    example = args[value_arg_idx]
-                    hier = guess_hierarchy(example, depth)
-                    data_cache_key = {snip_data_cache_key}
-                    hit = cache_get(data_cache_key)
-                    if hit:
-                        return hit
-                    {{get_func_level_2}}
-                    cache_set(data_cache_key, func_ret)
-                    return func_ret(*args)
+            with cache_flight(data_cache_key):
+                hit = cache_peek(data_cache_key)
+                if hit:
+                    return hit
 
-            data_cache_key = {snip_data_cache_key}
-            cache_set(data_cache_key, func_ret)
+                if determined:
+                    {{get_func_level_2}}
+                else:
+                    # guessed functions by fingerprint of the values seen here
+                    inline_cache = dict()
+                    partial_hier, guess_depth = hier, depth
+
+                    def func_ret(*args):
+                        example = args[value_arg_idx]
+                        fingerprint = fingerprint_hierarchy(example, partial_hier, guess_depth)
+                        hit = inline_cache.get(fingerprint)
+                        if hit is not None:
+                            return hit(*args)
+
+                        hier = guess_hierarchy(example, partial_hier, guess_depth)
+                        depth = None
+                        data_cache_key = {snip_data_cache_key}
+                        hit = cache_get(data_cache_key)
+                        if not hit:
+                            with cache_flight(data_cache_key):
+                                hit = cache_peek(data_cache_key)
+                                if not hit:
+                                    {{get_func_level_6}}
+                                    cache_set(data_cache_key, func_ret)
+                                    hit = func_ret
+                        if len(inline_cache) >= INLINE_CACHE_SIZE:
+                            # the oldest fingerprint makes room
+                            inline_cache.pop(next(iter(inline_cache), None), None)
+                        inline_cache[fingerprint] = hit
+                        return hit(*args)
+
+                cache_set(data_cache_key, func_ret)
             return func_ret
             """
         else:
@@ -101,13 +136,19 @@ class OperatorBase:
 
             if not determined:
                 raise ValueError("hier should not contain placeholder `...`")
-            {{get_func_level_0}}
-            cache_set(data_cache_key, func_ret)
+
+            with cache_flight(data_cache_key):
+                hit = cache_peek(data_cache_key)
+                if hit:
+                    return hit
+
+                {{get_func_level_1}}
+                cache_set(data_cache_key, func_ret)
             return func_ret
             """
 
         ret = dedent(snip_body).format_map(
-            {f"get_func_level_{i}": reindent(snip_get_func, level=i) for i in range(3)}
+            {f"get_func_level_{i}": reindent(snip_get_func, level=i) for i in range(7)}
         )
         return ret
 
@@ -127,10 +168,15 @@ class OperatorBase:
         objects = dict(
             create_hierarchy=create_hierarchy,
             guess_hierarchy=guess_hierarchy,
+            fingerprint_hierarchy=fingerprint_hierarchy,
+            INLINE_CACHE_SIZE=INLINE_CACHE_SIZE,
             value_arg_idx=self._value_arg_idx,
             cache_get=cachelib.cache_get,
             cache_set=cachelib.cache_set,
+            cache_peek=cachelib.cache_peek,
+            cache_flight=cachelib.cache_flight,
             getframe=sys._getframe,
+            OPERATORS=OPERATORS,
         )
         objects.update(self._get_extra_constants())
         objects.update(self._extra_constants)
@@ -139,6 +185,24 @@ class OperatorBase:
     def _get_extra_constants(self):
         return {}
 
+    def _make_builder(self, variant: str, build_func: Callable) -> Callable:
+        name = self._name
+        prebuilt_get = cachelib.prebuilt_get
+
+        def builder(hier, *args):
+            prebuilt_key = (name, variant, hier, args)
+            func = prebuilt_get(prebuilt_key)
+            if func is None:
+                if instrument.ENABLED or profiling.ENABLED or sourcedump.ENABLED:
+                    func = instrument.build(name, variant, build_func, hier, args)
+                else:
+                    func = build_func(hier, *args)
+                for hook in BUILD_HOOKS:
+                    hook(prebuilt_key, func)
+            return func
+
+        return builder
+
     def compile(self) -> Callable:
         operator_sig = self._snip_operator_sig()
         constants = self._get_constants()
@@ -153,7 +217,9 @@ class OperatorBase:
             ]
         )
 
-        return make_func(self._name, operator_sig, func_body, constants)
+        operator = make_func(self._name, operator_sig, func_body, constants)
+        OPERATORS[self._name] = operator
+        return operator
 
 
 class SimpleOperator(OperatorBase):
@@ -172,7 +238,7 @@ class SimpleOperator(OperatorBase):
 
     def _get_extra_constants(self):
         return dict(
-            build_func=self._build_func,
+            build_func=self._make_builder("build_func", self._build_func),
         )
 
 
@@ -181,6 +247,7 @@ class VariadicOperator(OperatorBase):
         self._build_func_single_arg = None
         self._build_func_multi_arg = None
         self._extra_operator_sig += "ninputs=None, "
+        self._extra_cache_key_args.append("ninputs")
 
     def build_func_at_single_arg(self, f):
         self._build_func_single_arg = f
@@ -192,27 +259,54 @@ class VariadicOperator(OperatorBase):
 
     def _snip_get_func(self):
         extra_args = self._extra_operator_args
+        options = ", ".join(f"{arg}={arg}" for arg in re.findall(r"\w+", extra_args))
         snip = f"""
-        func_single_arg = build_func_single_arg(hier, {extra_args})
-        func_multi_arg = build_func_multi_arg(hier, {extra_args})
-
-        if ninputs is not None:
-            if ninputs == 1:
-                func_ret = func_single_arg
-            else:
-                func_ret = func_multi_arg
+        if ninputs == 1:
+            func_ret = build_func_single_arg(hier, {extra_args})
+        elif ninputs is not None:
+            func_ret = build_func_multi_arg(hier, {extra_args}, ninputs)
         else:
-            nargs_threshold = value_arg_idx + 1
-            def func_ret(*args):
-                if len(args) > nargs_threshold:
-                    return func_multi_arg(*args)
-                else:
-                    return func_single_arg(*args)
+            func_ret = dispatch_arities(
+                OPERATORS[{self._name!r}], hier, dict({options}), value_arg_idx, data_cache_key
+            )
         """
         return snip
 
     def _get_extra_constants(self):
         return dict(
-            build_func_single_arg=self._build_func_single_arg,
-            build_func_multi_arg=self._build_func_multi_arg,
+            dispatch_arities=dispatch_arities,
+            build_func_single_arg=self._make_builder(
+                "build_func_single_arg", self._build_func_single_arg
+            ),
+            build_func_multi_arg=self._make_builder(
+                "build_func_multi_arg", self._build_func_multi_arg
+            ),
         )
+
+
+# Without `ninputs`, the functions of a variadic operator are built per number
+# of arguments on the first call with it, through the operator so that they
+# are shared with an explicit `ninputs`. The first one built, guarded to hand
+# other numbers of arguments back here, then replaces the dispatcher in the
+# operator cache: later lookups return it, and its calls go straight to the
+# generated code.
+def dispatch_arities(operator, hier, options: dict, value_arg_idx: int, cache_key: tuple):
+    funcs_by_nargs = {}
+
+    def dispatch(*args):
+        nargs = len(args)
+        if nargs and args[-1] is SPILL:
+            nargs -= 1
+            args = args[:-1]
+        func = funcs_by_nargs.get(nargs)
+        if func is None:
+            ninputs = nargs - value_arg_idx if nargs > value_arg_idx + 1 else 1
+            func = operator(hier, ninputs=ninputs, **options)
+            funcs_by_nargs[nargs] = func
+            if len(funcs_by_nargs) == 1:
+                guarded = make_arity_guarded(func, dispatch)
+                if guarded is not None:
+                    cachelib.cache_set(cache_key, guarded)
+        return func(*args)
+
+    return dispatch
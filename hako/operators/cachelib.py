@@ -1,5 +1,171 @@
-cache = {}
+import threading
+import typing as t
+from contextlib import contextmanager
+from collections import OrderedDict
 
-cache_set = cache.__setitem__
+from hako import flags
+
+__all__ = [
+    "OperatorCache",
+    "cache",
+    "cache_get",
+    "cache_set",
+    "cache_clear",
+    "cache_peek",
+    "cache_flight",
+    "cache_configure",
+    "cache_snapshot",
+]
+
+
+class _Shelf:
+    __slots__ = ("entries", "maxsize", "hits", "misses", "evictions", "compiles")
+
+    def __init__(self, maxsize: t.Optional[int]) -> None:
+        self.entries = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compiles = 0
+
+    def snapshot(self) -> t.Dict[str, t.Optional[int]]:
+        return dict(
+            size=len(self.entries),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            compiles=self.compiles,
+        )
+
+
+# LRU cache of generated functions, with one shelf per operator name. Keys are
+# tuples whose first item is the operator name.
+class OperatorCache:
+    def __init__(self, maxsize: t.Optional[int] = None) -> None:
+        self._default_maxsize = maxsize
+        self._maxsizes: t.Dict[str, t.Optional[int]] = {}
+        self._shelves: t.Dict[str, _Shelf] = {}
+        self._lock = threading.Lock()
+        # key -> [lock, number of threads holding or waiting for it]
+        self._flights: t.Dict[tuple, list] = {}
+
+    def _get_shelf(self, name: str) -> _Shelf:
+        shelf = self._shelves.get(name)
+        if shelf is None:
+            with self._lock:
+                shelf = self._shelves.get(name)
+                if shelf is None:
+                    maxsize = self._maxsizes.get(name, self._default_maxsize)
+                    shelf = self._shelves[name] = _Shelf(maxsize)
+        return shelf
+
+    # Lookups reorder the entries and count hits, so they hold the lock as
+    # writes do: neither the OrderedDict nor the counters are thread-safe
+    # without the GIL.
+    def get(self, key: tuple):
+        shelf = self._get_shelf(key[0])
+        with self._lock:
+            entries = shelf.entries
+            value = entries.get(key)
+            if value is None:
+                shelf.misses += 1
+                return None
+            entries.move_to_end(key)
+            shelf.hits += 1
+            return value
+
+    def peek(self, key: tuple):
+        shelf = self._shelves.get(key[0])
+        if shelf is None:
+            return None
+        with self._lock:
+            return shelf.entries.get(key)
+
+    # Serializes the builds of one key: the first thread builds and sets the
+    # entry while the others block here, then find the entry via `peek`.
+    @contextmanager
+    def flight(self, key: tuple):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = [threading.Lock(), 0]
+            flight[1] += 1
+
+        try:
+            with flight[0]:
+                yield
+        finally:
+            with self._lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self._flights[key]
+
+    def set(self, key: tuple, value) -> None:
+        shelf = self._get_shelf(key[0])
+        with self._lock:
+            entries = shelf.entries
+            entries[key] = value
+            entries.move_to_end(key)
+            shelf.compiles += 1
+            maxsize = shelf.maxsize
+            while maxsize is not None and len(entries) > maxsize:
+                entries.popitem(last=False)
+                shelf.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for shelf in self._shelves.values():
+                shelf.entries.clear()
+
+    def configure(self, name: t.Optional[str] = None, *, maxsize: t.Optional[int]):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"expect maxsize to be None or positive, got {maxsize!r}")
+
+        with self._lock:
+            if name is None:
+                self._default_maxsize = maxsize
+                shelves = [
+                    shelf
+                    for name, shelf in self._shelves.items()
+                    if name not in self._maxsizes
+                ]
+            else:
+                self._maxsizes[name] = maxsize
+                shelves = [self._shelves[name]] if name in self._shelves else []
+
+            for shelf in shelves:
+                shelf.maxsize = maxsize
+                entries = shelf.entries
+                while maxsize is not None and len(entries) > maxsize:
+                    entries.popitem(last=False)
+                    shelf.evictions += 1
+
+    def snapshot(self) -> t.Dict[str, t.Dict[str, t.Optional[int]]]:
+        with self._lock:
+            return {name: shelf.snapshot() for name, shelf in self._shelves.items()}
+
+    def __len__(self) -> int:
+        return sum(len(shelf.entries) for shelf in self._shelves.values())
+
+    def __contains__(self, key: tuple) -> bool:
+        shelf = self._shelves.get(key[0])
+        return shelf is not None and key in shelf.entries
+
+
+cache = OperatorCache(flags.OPERATOR_CACHE_SIZE)
+
+cache_set = cache.set
 cache_get = cache.get
 cache_clear = cache.clear
+cache_peek = cache.peek
+cache_flight = cache.flight
+cache_configure = cache.configure
+cache_snapshot = cache.snapshot
+
+# functions generated ahead of time, see `hako.aot`
+prebuilt = {}
+
+prebuilt_set = prebuilt.__setitem__
+prebuilt_get = prebuilt.get
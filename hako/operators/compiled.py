@@ -0,0 +1,47 @@
+from functools import partial
+from typing import Callable
+
+from hako.bricks.shaping import create_hierarchy
+from .bases import OPERATORS
+
+__all__ = ["CompiledOperator", "bind"]
+
+
+# A generated function bound once and for all to its operator, hierarchy and
+# options. Calling it goes straight to the generated function, without the
+# hierarchy normalization, cache lookup and arity dispatch done by operators.
+class CompiledOperator(partial):
+    __slots__ = ("operator", "hier", "options")
+
+    def __new__(cls, operator: Callable, hier, options: dict):
+        self = super().__new__(cls, operator(hier, **options))
+        self.operator = operator
+        self.hier = hier
+        self.options = options
+        return self
+
+    def __repr__(self) -> str:
+        options = "".join(f", {k}={v!r}" for k, v in self.options.items())
+        return f"<bound {self.operator.__name__}({self.hier!r}{options})>"
+
+    def __reduce__(self):
+        return _rebuild, (self.operator.__name__, self.hier, self.options)
+
+
+def _rebuild(name: str, hier, options: dict) -> CompiledOperator:
+    return CompiledOperator(OPERATORS[name], hier, options)
+
+
+def bind(operator: Callable, hier, **options) -> CompiledOperator:
+    if OPERATORS.get(getattr(operator, "__name__", None)) is not operator:
+        raise TypeError(f"expect a hako operator, got {operator!r}")
+
+    hier, determined = create_hierarchy(hier)
+    if not determined:
+        raise ValueError("hier should not contain placeholder `...`")
+
+    # variadic operators would otherwise dispatch on the number of arguments
+    if "ninputs" in (operator.__kwdefaults__ or {}) and options.get("ninputs") is None:
+        raise TypeError("expect ninputs to be given for a variadic operator")
+
+    return CompiledOperator(operator, hier, options)
@@ -1,4 +1,6 @@
 from .checks import *
 from .destructions import *
 from .liftings import *
+from .mappings import *
+from .pipelines import *
 from .transforms import *
\ No newline at end of file
@@ -0,0 +1,56 @@
+from hako.codegen import CodeBuilder
+
+__all__ = ["push_check", "push_multi_check"]
+
+
+# Checks of one level shared by the operators walking down their inputs, so
+# that they report mismatched containers alike.
+def push_check(CB: CodeBuilder, GR) -> None:
+    CB.Push(
+        f"if {GR.CODE_ISNOTA()}:{{NL}}"
+        f'{{>>}}raise BoxMismatched(f"'
+        "ARG has unexpected shape\\n"
+        "ARG: {{repr_value({VAL})}}\\n"
+        f"SHAPE: {GR.Node!r}"
+        '")'
+    )
+
+
+# The 0-th ARG is checked against the level, the others against the 0-th.
+# Leaves VAL set to the 0-th ARG.
+def push_multi_check(CB: CodeBuilder, GR) -> None:
+    ST = CB.ST
+    FIRST = ST.Item("VALS", 0)
+    names = ST.Unpacked("VALS")
+    OTHERS = f"({', '.join(names[1:])},)" if names is not None else "{VALS}[1:]"
+    CB.Push(f"{{VAL}} = {FIRST}")
+    CB.Push(
+        f"if {GR.CODE_ISNOTA()}:{{NL}}"
+        f'{{>>}}raise BoxMismatched(f"'
+        f"0-th ARG has unexpected shape\\n"
+        "0-th ARG: {{repr_value({VAL})}}\\n"
+        f"SHAPE: {GR.Node!r}"
+        '")'
+    )
+
+    GR.Define_LENGTH_REF()
+    GR.Define_ISNOTA2_PROOF()
+
+    CB.Push(
+        f"for I, {{VAL}} in enumerate({OTHERS}, start=1):{{NL}}"
+        f"{{>>}}if {GR.CODE_ISNOTA2_AUTO()}:{{NL}}"
+        f'{{>>}}{{>>}}raise BoxMismatched(f"'
+        "{{I}}-th ARG has unexpected shape\\n"
+        "{{I}}-th ARG: {{repr_value({VAL})}}\\n"
+        f"SHAPE: {GR.Node!r}\\n"
+        '")',
+    )
+    CB.Push(
+        f"{{>>}}if {GR.CODE_LENGTH_MISMATCHED_AUTO()}:{{NL}}"
+        f'{{>>}}{{>>}}raise BoxMismatched(f"'
+        "{{I}}-th ARG has different length than 0-th ARG\\n"
+        f"0-th ARG: {{{{repr_value({FIRST})}}}}\\n"
+        "{{I}}-th ARG: {{repr_value({VAL})}}\\n"
+        f"SHAPE: {GR.Node!r}\\n"
+        '")',
+    )
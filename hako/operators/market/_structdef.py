@@ -0,0 +1,43 @@
+import typing as t
+from collections import namedtuple
+
+from hako.bricks.shaping import Hierarchy
+from hako.operators.bases import OPERATORS
+
+if t.TYPE_CHECKING:
+    from hako.codegen.grocery import SnippetGrocery
+
+__all__ = ["StructDef", "strip_targets", "CODE_LAYOUT", "CODE_LAYOUT_LENGTH"]
+
+
+# What `flatten(..., structure=True)` records besides the leaves: one entry
+# per container, in the order they are entered, for the levels whose shape is
+# not implied by the hierarchy. Entries are the keys of the containers rebuilt
+# from keys and values, e.g. variadic dicts, and the lengths of the others.
+class StructDef(namedtuple("StructDef", "hier layout size")):
+    __slots__ = ()
+
+    def unflatten(self, leaves: t.Sequence) -> t.Any:
+        return OPERATORS["unflatten"](self.hier)(self, leaves)
+
+
+def strip_targets(hier: Hierarchy) -> Hierarchy:
+    # targets only matter when rebuilding, values of both ends share a layout
+    return tuple(node._replace(target=None) for node in hier)
+
+
+def CODE_LAYOUT(GR: "SnippetGrocery") -> t.Optional[str]:
+    # the keys of keyed containers, the proofs of others are not recorded
+    if GR.DEFINED_NEW_FROM_ITER2 and GR.H_IS_KEYED:
+        return f"tuple({GR.CODE_NEW_FROM_ITER2_PROOF()})"
+    code = GR.CODE_GET_LENGTH()
+    # lengths which do not depend on the value are not worth recording
+    return code if "{VAL}" in code else None
+
+
+def CODE_LAYOUT_LENGTH(GR: "SnippetGrocery", INFO: str) -> str:
+    # the number of items of the container described by the entry `INFO`
+    if GR.DEFINED_NEW_FROM_ITER2 and GR.H_IS_KEYED:
+        return f"len({{{INFO}}})"
+    code = GR.CODE_GET_LENGTH()
+    return f"{{{INFO}}}" if "{VAL}" in code else code
@@ -1,7 +1,15 @@
-from hako.codegen import CodeBuilder
-from hako.operators.bases import VariadicOperator
+from itertools import islice
 
-__all__ = ["map", "visit", "flatten"]
+from hako.bricks.shaping import create_hierarchy
+from hako.codegen import CodeBuilder, register_constants
+from hako.misc.exceptions import BoxUnsupported
+from hako.misc.vectorize import call_gathered
+from hako.operators.bases import SimpleOperator, VariadicOperator
+
+from ._levelchecks import *
+from ._structdef import *
+
+__all__ = ["map", "visit", "flatten", "unflatten", "StructDef"]
 
 
 def template_map_with_single_arg(
@@ -11,24 +19,26 @@ def template_map_with_single_arg(
     yield_statement,
     postproc="",
     check=True,
+    layout=False,
 ):
     CB = CodeBuilder(*signature)
     GRs, ST = CB.Setup(hier)
 
+    if layout:
+        ST.Define("HIER")
+        CB.BindConstant("HIER", strip_targets(hier))
+        ST.Define("LAYOUT")
+        CB.Push("{LAYOUT} = []")
+
     if postproc:
         CB.Push("def __GEN__():")
         CB.Indent()
 
     for GR in GRs:
         if check:
-            CB.Push(
-                f"if {GR.CODE_ISNOTA()}:{{NL}}"
-                f'{{>>}}raise BoxMismatched(f"'
-                "ARG has unexpected shape\\n"
-                "ARG: {{{VAL}!r}}\\n"
-                f"SHAPE: {GR.Node!r}"
-                '")'
-            )
+            push_check(CB, GR)
+        if layout and CODE_LAYOUT(GR) is not None:
+            CB.Push(f"{{LAYOUT}}.append({CODE_LAYOUT(GR)})")
         ST.DefineOrOverwrite("LOOP_VAR")
         CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER_AUTO()}:")
         CB.Indent()
@@ -60,42 +70,10 @@ def template_map_with_multi_arg(
     ST.Define("VAL")
     for GR in GRs:
         if check:
-            CB.Push("{VAL} = {VALS}[0]")
-            CB.Push(
-                f"if {GR.CODE_ISNOTA()}:{{NL}}"
-                f'{{>>}}raise BoxMismatched(f"'
-                f"0-th ARG has unexpected shape\\n"
-                "0-th ARG: {{{VAL}!r}}\\n"
-                f"SHAPE: {GR.Node!r}"
-                '")'
-            )
-
-            GR.Define_LENGTH_REF()
-            GR.Define_ISNOTA2_PROOF()
-
-            CB.Push(
-                "for I, {VAL} in enumerate({VALS}[1:], start=1):{NL}"
-                f"{{>>}}if {GR.CODE_ISNOTA2_AUTO()}:{{NL}}"
-                f'{{>>}}{{>>}}raise BoxMismatched(f"'
-                "{{I}}-th ARG has unexpected shape\\n"
-                "{{I}}-th ARG: {{{VAL}!r}}\\n"
-                f"SHAPE: {GR.Node!r}\\n"
-                '")',
-            )
-
-            CB.Push(
-                f"{{>>}}if {GR.CODE_LENGTH_MISMATCHED_AUTO()}:{{NL}}"
-                f'{{>>}}{{>>}}raise BoxMismatched(f"'
-                "{{I}}-th ARG has different length than 0-th ARG\\n"
-                "0-th ARG: {{{VALS}[0]!r}}\\n"
-                "{{I}}-th ARG: {{{VAL}!r}}\\n"
-                f"SHAPE: {GR.Node!r}\\n"
-                # "PROOF: {{{PROOF}!r}}"
-                '")',
-            )
+            push_multi_check(CB, GR)
 
         ST.DefineOrOverwrite("LOOP_VAR")
-        GR.Define_ITER2_PROOF(setup="{VAL} = {VALS}[0]")
+        GR.Define_ITER2_PROOF(setup=f"{{VAL}} = {ST.Item('VALS', 0)}")
         CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER2_ZIP_AUTO()}:")
         CB.Indent()
         ST.Alias("LOOP_VAR", "VALS")
@@ -110,17 +88,29 @@ def template_map_with_multi_arg(
     return CB.End(func_name)
 
 
+register_constants(call_gathered=call_gathered, islice=islice, StructDef=StructDef)
+
 map = VariadicOperator(
     "map",
     value_arg_idx=1,
     guessable=True,
-    extra_operator_sig="lazy=True, check=True, ",
-    extra_operator_args="lazy, check",
+    extra_operator_sig="lazy=True, check=True, vectorize=False, ",
+    extra_operator_args="lazy, check, vectorize",
 )
 
 
 @map.build_func_at_single_arg
-def map_single(hier, lazy, check):
+def map_single(hier, lazy, check, vectorize=False):
+    if vectorize:
+        # leaves are gathered, passed to FUNC at once, and handed back in order
+        return template_map_with_single_arg(
+            hier,
+            "map_",
+            (["FUNC", "VAL"], None, None),
+            "yield {VAL}",
+            f"return call_gathered({{FUNC}}, __GEN__(), 1, {lazy!r})",
+            check,
+        )
     return template_map_with_single_arg(
         hier,
         "map_",
@@ -132,11 +122,20 @@ def map_single(hier, lazy, check):
 
 
 @map.build_func_at_multi_arg
-def map_multi(hier, lazy, check):
+def map_multi(hier, lazy, check, vectorize, ninputs):
+    if vectorize:
+        return template_map_with_multi_arg(
+            hier,
+            "map_",
+            (["FUNC"], ("VALS", ninputs), None),
+            "yield {VALS}",
+            f"return call_gathered({{FUNC}}, __GEN__(), {ninputs}, {lazy!r})",
+            check,
+        )
     return template_map_with_multi_arg(
         hier,
         "map_",
-        (["FUNC"], "VALS", None),
+        (["FUNC"], ("VALS", ninputs), None),
         "yield {FUNC}(*{VALS})",
         "" if lazy else "return list(__GEN__())",
         check,
@@ -168,11 +167,11 @@ def visit_single(hier, check):
 
 
 @visit.build_func_at_multi_arg
-def visit_multi(hier, check):
+def visit_multi(hier, check, ninputs):
     return template_map_with_multi_arg(
         hier,
         "visit",
-        (["FUNC"], "VALS", None),
+        (["FUNC"], ("VALS", ninputs), None),
         "{FUNC}(*{VALS})",
         "",
         check,
@@ -182,17 +181,48 @@ def visit_multi(hier, check):
 visit = visit.compile()
 
 
+def check_structure(hier) -> None:
+    hier, determined = create_hierarchy(hier)
+    if not determined:
+        return
+    for node in hier:
+        if node.boxtype.Primitives["GET_LENGTH"] is None:
+            raise BoxUnsupported(
+                f"structure=True cannot record the length of {node!r}, "
+                f"its containers are not sized"
+            )
+
+
 flatten = VariadicOperator(
     "flatten",
     value_arg_idx=0,
     guessable=True,
-    extra_operator_sig="lazy=True, check=True, ",
-    extra_operator_args="lazy, check",
+    extra_operator_sig="lazy=True, check=True, structure=False, ",
+    extra_operator_args="lazy, check, structure",
+    # reject unsized levels before any value is seen
+    pre_check_snip="""
+    if structure and hier is not None:
+        check_structure(hier)
+    """,
+    extra_constants=dict(check_structure=check_structure),
 )
 
 
 @flatten.build_func_at_single_arg
-def flatten_single(hier, lazy, check):
+def flatten_single(hier, lazy, check, structure=False):
+    if structure:
+        check_structure(hier)
+        # the layout is complete once all the leaves are produced
+        return template_map_with_single_arg(
+            hier,
+            "flatten",
+            (["VAL"], None, None),
+            "yield {VAL}",
+            "__LEAVES__ = list(__GEN__()){NL}"
+            "return __LEAVES__, StructDef({HIER}, tuple({LAYOUT}), len(__LEAVES__))",
+            check,
+            layout=True,
+        )
     return template_map_with_single_arg(
         hier,
         "flatten",
@@ -204,11 +234,13 @@ def flatten_single(hier, lazy, check):
 
 
 @flatten.build_func_at_multi_arg
-def flatten_multi(hier, lazy, check):
+def flatten_multi(hier, lazy, check, structure, ninputs):
+    if structure:
+        raise TypeError("structure=True expects a single input")
     return template_map_with_multi_arg(
         hier,
         "flatten",
-        ([], "VALS", None),
+        ([], ("VALS", ninputs), None),
         "yield {VALS}",
         "" if lazy else "return list(__GEN__())",
         check,
@@ -216,3 +248,76 @@ def flatten_multi(hier, lazy, check):
 
 
 flatten = flatten.compile()
+
+
+unflatten = SimpleOperator(
+    "unflatten",
+    guessable=False,
+    extra_operator_sig="check=True, ",
+    extra_operator_args="check,",
+)
+
+
+@unflatten.build_func
+def unflatten_build(hier, check):
+    CB = CodeBuilder(["STRUCT", "LEAVES"], None, None)
+    GRs, ST = CB.Setup(hier)
+
+    if check:
+        ST.Define("HIER")
+        CB.BindConstant("HIER", strip_targets(hier))
+        CB.Push(
+            "if {STRUCT}.__class__ is not StructDef or {STRUCT}.hier != {HIER}:{NL}"
+            f'{{>>}}raise BoxMismatched(f"'
+            "STRUCT does not describe values of this shape\\n"
+            "STRUCT: {{repr_value({STRUCT})}}\\n"
+            f"SHAPE: {hier!r}"
+            '")'
+        )
+        CB.Push(
+            "if len({LEAVES}) != {STRUCT}.size:{NL}"
+            f'{{>>}}raise BoxMismatched(f"'
+            "LEAVES has unexpected length\\n"
+            "LEAVES: {{len({LEAVES})}} items\\n"
+            "STRUCT: {{{STRUCT}.size}} items"
+            '")'
+        )
+
+    ST.Define("LAYOUT")
+    CB.Push("{LAYOUT} = iter({STRUCT}.layout)")
+    ST.Alias("LEAVES", "ITEMS")
+    ST.DefineOrOverwrite("LEAVES")
+    CB.Push("{LEAVES} = iter({ITEMS})")
+    if not GRs:
+        CB.Push("return next({LEAVES})")
+        return CB.End("unflatten")
+
+    # containers are rebuilt in the order they were entered by `flatten`
+    LEVELs = [ST.NewDefinedSymbol() for _ in GRs]
+    for i, GR in enumerate(GRs):
+        CB.Push("def {LEVEL}(_):", LEVEL=LEVELs[i])
+        CB.Indent()
+        INFO = ST.NewDefinedSymbol()
+        if CODE_LAYOUT(GR) is not None:
+            CB.Push("{INFO} = next({LAYOUT})", INFO=INFO)
+        for GRp in (GR, GR.TargetGrocery):
+            if GRp is not None and GRp.DEFINED_NEW_FROM_ITER2 and GRp.H_IS_KEYED:
+                ST.DefineOrOverwrite(GRp.SYM_NIPROOF)
+                CB.Push(f"{{{GRp.SYM_NIPROOF}}} = {{INFO}}", INFO=INFO)
+        CODE_LENGTH = CODE_LAYOUT_LENGTH(GR, INFO)
+        ST.DefineOrOverwrite("VAL")
+        if GR is GRs[-1]:
+            CB.Push(f"{{VAL}} = islice({{LEAVES}}, {CODE_LENGTH})")
+        else:
+            CB.Push(
+                f"{{VAL}} = map({{NEXT}}, range({CODE_LENGTH}))",
+                NEXT=LEVELs[i + 1],
+            )
+        CB.Push(f"return {GR.CODE_NEW_FROM_ITER2_AUTO()}")
+        CB.Dedent()
+
+    CB.Push("return {LEVEL}(None)", LEVEL=LEVELs[0])
+    return CB.End("unflatten")
+
+
+unflatten = unflatten.compile()
@@ -0,0 +1,183 @@
+from itertools import starmap
+
+from hako.bricks.shaping import create_hierarchy
+from hako.codegen import CodeBuilder, register_constants
+from hako.operators.bases import VariadicOperator
+
+from ._levelchecks import *
+
+__all__ = ["tree_map"]
+
+
+def check_inplace(hier) -> None:
+    hier, determined = create_hierarchy(hier)
+    if not determined:
+        return
+    if any(node.target is not None for node in hier):
+        raise TypeError(f"inplace=True cannot convert containers, got {hier!r}")
+    if not hier or hier[-1].boxtype.Primitives["SET_ITEM"] is None:
+        raise TypeError(f"inplace=True expects a mutable innermost level, got {hier!r}")
+
+
+# One local function per level rebuilds a container from the results of the
+# function of the next level, the innermost one being FUNC itself.
+def template_tree_map_with_single_arg(hier, check):
+    CB = CodeBuilder(["FUNC", "VALUE"], None, None)
+    GRs, ST = CB.Setup(hier)
+    LEVELs = [ST.NewDefinedSymbol() for _ in GRs] + ["FUNC"]
+
+    for GR, LEVEL, NEXT in zip(GRs, LEVELs, LEVELs[1:]):
+        ST.DefineOrOverwrite("VAL")
+        CB.Push("def {LEVEL}({VAL}):", LEVEL=LEVEL)
+        CB.Indent()
+        if check:
+            push_check(CB, GR)
+        GR.Define_NEW_FROM_ITER2_PROOF(
+            cond=GR.DEFINED_NEW_FROM_ITER2 and not GR.HasTarget
+        )
+        ITEMS = ST.NewDefinedSymbol()
+        CB.Push(f"{{ITEMS}} = map({{NEXT}}, {GR.CODE_ITER_AUTO()})", ITEMS=ITEMS, NEXT=NEXT)
+        CB.Push(f"return {GR.CODE_NEW_FROM_ITER2_AUTO()}", VAL=ITEMS)
+        CB.Dedent()
+
+    CB.Push("return {LEVEL}({VALUE})", LEVEL=LEVELs[0])
+    return CB.End("tree_map")
+
+
+def template_tree_map_with_multi_arg(hier, check, ninputs):
+    CB = CodeBuilder(["FUNC"], ("VALS", ninputs), None)
+    GRs, ST = CB.Setup(hier)
+    LEVELs = [ST.NewDefinedSymbol() for _ in GRs] + ["FUNC"]
+    ST.Alias("VALS", "VALUES")
+
+    for GR, LEVEL, NEXT in zip(GRs, LEVELs, LEVELs[1:]):
+        ST.DefineOrOverwrite("VALS")
+        ST.DefineOrOverwrite("VAL")
+        CB.Push("def {LEVEL}(*{VALS}):", LEVEL=LEVEL)
+        CB.Indent()
+        if check:
+            push_multi_check(CB, GR)
+
+        # the structure of the result follows the 0-th ARG
+        CB.Push(f"{{VAL}} = {ST.Item('VALS', 0)}")
+        GR.Define_ITER2_PROOF()
+        GR.Define_NEW_FROM_ITER2_PROOF(
+            cond=GR.DEFINED_NEW_FROM_ITER2 and not GR.HasTarget
+        )
+        ITEMS = ST.NewDefinedSymbol()
+        CB.Push(
+            f"{{ITEMS}} = starmap({{NEXT}}, {GR.CODE_ITER2_ZIP_AUTO()})",
+            ITEMS=ITEMS,
+            NEXT=NEXT,
+        )
+        CB.Push(f"return {GR.CODE_NEW_FROM_ITER2_AUTO()}", VAL=ITEMS)
+        CB.Dedent()
+
+        GR.ResetProofPool()
+
+    CB.Push(f"return {{LEVEL}}({ST.Star('VALUES')})", LEVEL=LEVELs[0])
+    return CB.End("tree_map")
+
+
+# Outer levels are only walked through, the results are stored over the leaves
+# of the innermost containers, which are then returned as they are.
+def template_tree_map_inplace_with_single_arg(hier, check):
+    check_inplace(hier)
+    CB = CodeBuilder(["FUNC", "VALUE"], None, None)
+    GRs, ST = CB.Setup(hier)
+
+    ST.Define("VAL")
+    CB.Push("{VAL} = {VALUE}")
+    for GR in GRs[:-1]:
+        if check:
+            push_check(CB, GR)
+        ST.DefineOrOverwrite("LOOP_VAR")
+        CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER_AUTO()}:")
+        CB.Indent()
+        ST.Alias("LOOP_VAR", "VAL")
+
+    GR = GRs[-1]
+    if check:
+        push_check(CB, GR)
+    ST.Define("INDEX")
+    ST.Define("ITEM")
+    CB.Push(f"for {{INDEX}}, {{ITEM}} in zip({GR.CODE_GET_INDICES()}, {GR.CODE_ITER_AUTO()}):")
+    CB.Indent()
+    CB.Push("{ITEM} = {FUNC}({ITEM})")
+    CB.Push(GR.CODE_SET_ITEM())
+
+    CB.DedentToFront()
+    CB.Push("return {VALUE}")
+    return CB.End("tree_map")
+
+
+def template_tree_map_inplace_with_multi_arg(hier, check, ninputs):
+    check_inplace(hier)
+    CB = CodeBuilder(["FUNC"], ("VALS", ninputs), None)
+    GRs, ST = CB.Setup(hier)
+    ST.Alias("VALS", "VALUES")
+
+    ST.Define("VAL")
+    for GR in GRs[:-1]:
+        if check:
+            push_multi_check(CB, GR)
+        ST.DefineOrOverwrite("LOOP_VAR")
+        GR.Define_ITER2_PROOF(setup=f"{{VAL}} = {ST.Item('VALS', 0)}")
+        CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER2_ZIP_AUTO()}:")
+        CB.Indent()
+        ST.Alias("LOOP_VAR", "VALS")
+        GR.ResetProofPool()
+
+    GR = GRs[-1]
+    if check:
+        push_multi_check(CB, GR)
+    # results are stored into the 0-th ARG
+    CB.Push(f"{{VAL}} = {ST.Item('VALS', 0)}")
+    GR.Define_ITER2_PROOF()
+    ST.Define("INDEX")
+    ST.Define("ITEMS")
+    CB.Push(
+        f"for {{INDEX}}, {{ITEMS}} in zip({GR.CODE_GET_INDICES()}, {GR.CODE_ITER2_ZIP_AUTO()}):"
+    )
+    CB.Indent()
+    ST.Define("ITEM")
+    CB.Push("{ITEM} = {FUNC}(*{ITEMS})")
+    CB.Push(GR.CODE_SET_ITEM())
+
+    CB.DedentToFront()
+    CB.Push(f"return {ST.Item('VALUES', 0)}")
+    return CB.End("tree_map")
+
+
+register_constants(starmap=starmap)
+
+tree_map = VariadicOperator(
+    "tree_map",
+    value_arg_idx=1,
+    guessable=True,
+    extra_operator_sig="check=True, inplace=False, ",
+    extra_operator_args="check, inplace",
+    # reject immutable levels before any value is seen
+    pre_check_snip="""
+    if inplace and hier is not None:
+        check_inplace(hier)
+    """,
+    extra_constants=dict(check_inplace=check_inplace),
+)
+
+
+@tree_map.build_func_at_single_arg
+def tree_map_single(hier, check, inplace):
+    if inplace:
+        return template_tree_map_inplace_with_single_arg(hier, check)
+    return template_tree_map_with_single_arg(hier, check)
+
+
+@tree_map.build_func_at_multi_arg
+def tree_map_multi(hier, check, inplace, ninputs):
+    if inplace:
+        return template_tree_map_inplace_with_multi_arg(hier, check, ninputs)
+    return template_tree_map_with_multi_arg(hier, check, ninputs)
+
+
+tree_map = tree_map.compile()
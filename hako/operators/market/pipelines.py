@@ -0,0 +1,256 @@
+import typing as t
+from functools import partial
+
+from hako.codegen import CodeBuilder
+from hako.bricks.shaping import Hierarchy, create_hierarchy
+from hako.operators.bases import OPERATORS, SimpleOperator
+
+from ._levelchecks import push_check
+from ._permspec import parse_permspec
+from .transforms import push_check_pass, push_prep_pass, transform_build
+
+__all__ = ["pipeline"]
+
+
+# Leaves of `hier` are visited in the order of the levels permuted by `perm`,
+# passed through FUNC0, FUNC1... and yielded, or handed over to the last
+# function when `visit` is set. The permuted levels are walked by index as in
+# `transform`, without building the transposed containers.
+fuse = SimpleOperator(
+    "fuse",
+    guessable=False,
+    extra_operator_sig="perm=(), nfuncs=0, visit=False, lazy=True, check=True, ",
+    extra_operator_args="perm, nfuncs, visit, lazy, check,",
+)
+
+
+@fuse.build_func
+def fuse_build(hier: Hierarchy, perm: tuple, nfuncs: int, visit: bool, lazy: bool, check: bool):
+    FUNCs = [f"FUNC{i}" for i in range(nfuncs)]
+    CB = CodeBuilder([*FUNCs, "VALUE"], None, None)
+    GRs, ST = CB.Setup(hier)
+    length = len(perm)
+
+    if not visit:
+        CB.Push("def __GEN__():")
+        CB.Indent()
+
+    if length:
+        push_prep_pass(CB, GRs[:length], check)
+        if check:
+            push_check_pass(CB, GRs[:length])
+        CB.Push("if {EMPTIED}:{NL}{>>}return")
+
+        # an item is picked as soon as the indices of the levels above are known
+        INDEXs = [ST.NewDefinedSymbol() for _ in range(length)]
+        CUR, picked = "VALUE", 0
+        for level in perm:
+            CB.Push(f"for {{{INDEXs[level]}}} in {{{GRs[level].SYM_INDICES}}}:")
+            CB.Indent()
+            while picked < length and picked in perm[: perm.index(level) + 1]:
+                NEXT = ST.NewDefinedSymbol()
+                CB.Push(
+                    f"{{{NEXT}}} = {GRs[picked].CODE_GET_ITEM()}",
+                    VAL=CUR,
+                    INDEX=INDEXs[picked],
+                )
+                CUR, picked = NEXT, picked + 1
+        ST.Alias(CUR, "VAL")
+    else:
+        ST.Define("VAL")
+        CB.Push("{VAL} = {VALUE}")
+
+    for GR in GRs[length:]:
+        if check:
+            push_check(CB, GR)
+        ST.DefineOrOverwrite("LOOP_VAR")
+        CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER_AUTO()}:")
+        CB.Indent()
+        ST.Alias("LOOP_VAR", "VAL")
+
+    leaf = "{VAL}"
+    for FUNC in FUNCs:
+        leaf = f"{{{FUNC}}}({leaf})"
+    CB.Push(leaf if visit else f"yield {leaf}")
+
+    CB.DedentToFront()
+    if not visit:
+        CB.Push("return __GEN__()" if lazy else "return list(__GEN__())")
+    return CB.End("fuse")
+
+
+fuse = fuse.compile()
+
+
+# `transform` returning containers whose leaves are passed through FUNC0,
+# FUNC1... as they are yielded by the rebuilding.
+transform_map = SimpleOperator(
+    "transform_map",
+    guessable=False,
+    extra_operator_sig="perm=(), nfuncs=0, check=True, ",
+    extra_operator_args="perm, nfuncs, check,",
+)
+
+
+@transform_map.build_func
+def transform_map_build(hier: Hierarchy, perm: tuple, nfuncs: int, check: bool):
+    return transform_build(hier, perm, check, False, False, nfuncs)
+
+
+transform_map = transform_map.compile()
+
+
+# Containers of `hier` are checked level by level as in the other operators,
+# and VALUE is returned untouched.
+validate = SimpleOperator("validate", guessable=False)
+
+
+@validate.build_func
+def validate_build(hier: Hierarchy):
+    CB = CodeBuilder(["VALUE"], None, None)
+    GRs, ST = CB.Setup(hier)
+    last_groc = GRs[-1]
+
+    ST.Define("VAL")
+    CB.Push("{VAL} = {VALUE}")
+    for GR in GRs:
+        push_check(CB, GR)
+
+        if GR is last_groc:
+            break
+
+        ST.DefineOrOverwrite("LOOP_VAR")
+        CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER_AUTO()}:")
+        CB.Indent()
+        ST.Alias("LOOP_VAR", "VAL")
+
+    CB.DedentToFront()
+    CB.Push("return {VALUE}")
+    return CB.End("validate")
+
+
+validate = validate.compile()
+
+
+# What each operator may be given in a stage, besides its function if any.
+_STAGE_OPTIONS = {
+    "isa": (0, ()),
+    "transform": (0, ("perm", "check")),
+    "tree_map": (1, ("check",)),
+    "map": (1, ("lazy", "check")),
+    "flatten": (0, ("lazy", "check")),
+    "visit": (1, ("check",)),
+}
+_TERMINALS = ("map", "flatten", "visit")
+
+
+def _parse_stage(stage) -> t.Tuple[str, tuple, dict]:
+    if stage.__class__ is not tuple:
+        stage = (stage,)
+    operator, *args = stage
+    options = args.pop() if args and args[-1].__class__ is dict else {}
+
+    name = getattr(operator, "__name__", None)
+    if OPERATORS.get(name) is not operator or name not in _STAGE_OPTIONS:
+        raise TypeError(f"expect one of {', '.join(_STAGE_OPTIONS)} as a stage, got {operator!r}")
+    nfuncs, allowed = _STAGE_OPTIONS[name]
+    if len(args) != nfuncs:
+        raise TypeError(f"expect {nfuncs} function(s) for {name}, got {len(args)}")
+    for option in options:
+        if option not in allowed:
+            raise TypeError(f"unexpected option {option!r} for {name} in a pipeline")
+    if name == "transform" and "perm" not in options:
+        raise TypeError("transform in a pipeline needs perm")
+    return name, tuple(args), options
+
+
+def _compose(funcs: t.Sequence[t.Callable]) -> t.Callable:
+    if len(funcs) == 1:
+        return funcs[0]
+
+    def composed(val):
+        for func in funcs:
+            val = func(val)
+        return val
+
+    return composed
+
+
+class Pipeline:
+    __slots__ = ("hier", "stages", "calls")
+
+    def __init__(self, hier: Hierarchy, stages: tuple, calls: t.List[t.Callable]) -> None:
+        self.hier = hier
+        self.stages = stages
+        self.calls = calls
+
+    def __call__(self, value):
+        for call in self.calls:
+            value = call(value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"<pipeline {self.hier!r} of {len(self.stages)} stage(s) in {len(self.calls)} call(s)>"
+
+
+def pipeline(hier, stages: t.Sequence) -> Pipeline:
+    hier, determined = create_hierarchy(hier)
+    if not determined:
+        raise ValueError("hier should not contain placeholder `...`")
+    if any(node.target is not None for node in hier):
+        raise TypeError(f"expect a hierarchy without targets, got {hier!r}")
+
+    stages = tuple(stages)
+    # stages are folded into a permutation of the levels of `hier`, the
+    # functions applied to the leaves, and at most one terminal stage
+    perm = tuple(range(len(hier)))
+    funcs = []
+    check = False
+    terminal = None
+    for index, stage in enumerate(stages):
+        name, args, options = _parse_stage(stage)
+        check = check or options.get("check", True)
+        if name == "transform":
+            spec = parse_permspec(options["perm"])
+            if len(spec) > len(hier):
+                raise ValueError(f"perm {options['perm']!r} is deeper than {hier!r}")
+            perm = tuple(perm[i] for i in spec) + perm[len(spec) :]
+        elif name == "tree_map":
+            funcs.extend(args)
+        elif name in _TERMINALS:
+            if index != len(stages) - 1:
+                raise TypeError(f"expect {name} to be the last stage")
+            funcs.extend(args)
+            terminal = (name, options.get("lazy", True))
+
+    # trailing levels left in place are iterated as they are
+    length = len(perm)
+    while length and perm[length - 1] == length - 1:
+        length -= 1
+    perm = perm[:length]
+    permuted = tuple(hier[i] for i in perm) + hier[length:]
+    moves_arrays = any(node.boxtype.Heuristics["IS_ARRAY_AXIS"] for node in hier[:length])
+
+    if terminal is not None:
+        name, lazy = terminal
+        kernel = fuse(
+            hier, perm=perm, nfuncs=len(funcs), visit=name == "visit", lazy=lazy, check=check
+        )
+        calls = [partial(kernel, *funcs)]
+    # values are returned in containers, rebuilt once with the leaves mapped
+    # as they are moved
+    elif perm and funcs and not moves_arrays:
+        kernel = transform_map(hier, perm=perm, nfuncs=len(funcs), check=check)
+        calls = [partial(kernel, *funcs)]
+    # a bare transposition, or array axes moved at once then mapped over
+    elif perm:
+        calls = [OPERATORS["transform"](hier, perm=perm, check=check)]
+        if funcs:
+            calls.append(partial(OPERATORS["tree_map"](permuted, check=False), _compose(funcs)))
+    elif funcs:
+        calls = [partial(OPERATORS["tree_map"](hier, check=check), _compose(funcs))]
+    elif check:
+        calls = [validate(hier)]
+    else:
+        calls = []
+    return Pipeline(hier, stages, calls)
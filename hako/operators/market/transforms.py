@@ -1,18 +1,31 @@
-from hako.codegen import CodeBuilder
+from itertools import chain
+
+from hako.codegen import CodeBuilder, register_constants
 from hako.bricks.shaping import Hierarchy
+from hako.misc.exceptions import BoxUnsupported
+from hako.misc.views import make_view
 from hako.operators.bases import SimpleOperator
 
+from ._levelchecks import push_check
 from ._permspec import *
 
 __all__ = ["transform"]
 
+register_constants(
+    make_view=make_view,
+    LookupError=LookupError,
+    chain_from_iterable=chain.from_iterable,
+)
+
 transform = SimpleOperator(
     "transform",
     guessable=True,
     value_arg_idx=0,
-    extra_operator_sig="perm=None, check=True, ",
-    extra_operator_args="perm, check, ",
+    extra_operator_sig="perm=None, check=True, lazy=False, view=False, ",
+    extra_operator_args="perm, check, lazy, view, ",
     pre_check_snip="""
+    assert not (lazy and view)
+    assert check in (True, False, "fused")
     assert hier or depth is not None or perm is not None
     assert not (hier and depth)
     if hier is not None:
@@ -38,19 +51,11 @@ transform = SimpleOperator(
 )
 
 
-@transform.build_func
-def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
-    cycles, length = find_cycles(permspec, hier)
-    hier = hier[:length]
-    CB = CodeBuilder(["VALUE"], None, None)
-    GRs, ST = CB.Setup(hier)
-
-    # operator should be identity when transformation is trivial
-    if not cycles:
-        CB.Push("return {VALUE}")
-        return CB.End("transform")
-
-    # do checking and prepare indices
+# Walks down the first item of every level to get the indices of each level,
+# the values being transposed all share them. EMPTIED tells whether an empty
+# level was met on the way, in which case there is nothing to transpose.
+def push_prep_pass(CB: CodeBuilder, GRs, check: bool) -> None:
+    ST = CB.ST
     ST.Define("VAL")
     CB.Push("{VAL} = {VALUE}")
     ST.Define("EMPTIED")
@@ -64,7 +69,7 @@ def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
                 f"if {GR.CODE_ISNOTA()}:{{NL}}"
                 f'{{>>}}raise BoxMismatched(f"'
                 "ARG has unexpected shape\\n"
-                "ARG: {{{VAL}!r}}\\n"
+                "ARG: {{repr_value({VAL})}}\\n"
                 f"SHAPE: {GR.Node!r}"
                 '")',
             )
@@ -75,8 +80,10 @@ def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
         if check:
             GR.Define_ISNOTA2_PROOF()
         GR.Define_ITER2_PROOF()
+        # proofs of levels which are not keyed describe the levels below
+        # them, which do not stay in place
         GR.Define_NEW_FROM_ITER2_PROOF(
-            cond=GR.DEFINED_NEW_FROM_ITER2 and not GR.HasTarget
+            cond=GR.DEFINED_NEW_FROM_ITER2 and GR.H_IS_KEYED and not GR.HasTarget
         )
         CB.Push(
             f"if not {{EMPTIED}} and {GR.CODE_IS_NOT_EMPTY()}:{{NL}}"
@@ -85,37 +92,328 @@ def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
         if GR is not GRs[-1]:
             CB.Push(f"else:{{NL}}" f"{{>>}}{{EMPTIED}} = True")
 
+
+# With `lookups` set, the indices of the proof are left to the lookups which
+# follow the check, see `ISNOTA_CLASS`.
+def push_level_check(CB: CodeBuilder, GR, lookups: bool = False) -> None:
+    ISNOTA = GR.CODE_ISNOTA_CLASS_AUTO() if lookups else GR.CODE_ISNOTA2_AUTO()
+    CB.Push(
+        f"if {ISNOTA}:{{NL}}"
+        f'{{>>}}raise BoxMismatched(f"'
+        "ARG has unexpected shape\\n"
+        "ARG: {{repr_value({VAL})}}\\n"
+        f"SHAPE: {GR.Node!r}"
+        '")',
+    )
+    CB.Push(
+        f"if {GR.CODE_LENGTH_MISMATCHED_AUTO()}:{{NL}}"
+        f'{{>>}}raise BoxMismatched(f"'
+        "ARG has unexpected length\\n"
+        "ARG: {{repr_value({VAL})}}\\n"
+        f"SHAPE: {GR.Node!r}\\n"
+        # "PROOF: {{repr_value({PROOF})}}"
+        '")',
+    )
+
+
+# Checks that every item of every level matches the indices found by the
+# preparation pass, starting from the container SRC.
+def push_check_pass(
+    CB: CodeBuilder, GRs, SRC: str = "VALUE", lookups: bool = False
+) -> None:
+    ST = CB.ST
+    CB.Push(f"{{VAL}} = {{{SRC}}}")
+    for GR in GRs:
+        push_level_check(CB, GR, lookups)
+        if GR is GRs[-1]:
+            break
+
+        ST.DefineOrOverwrite("LOOP_VAR")
+        CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER2_AUTO()}:")
+        CB.Indent()
+        ST.Alias("LOOP_VAR", "VAL")
+    CB.Dedent(len(GRs) - 1)
+
+
+# Items of the result are looked up in the value at access time, given the
+# indices found by the preparation pass, see `hako.misc.views`.
+def push_view(CB: CodeBuilder, GRs, perm: PermSpec) -> None:
+    ST = CB.ST
+    pos = tuple(perm.index(level) for level in range(len(perm)))
+    keyed = tuple(
+        (GRs[level].TargetGrocery or GRs[level]).H_IS_KEYED for level in perm
+    )
+
+    INDICES = []
+    for level, GR in enumerate(GRs):
+        # keys are addressed by position when the result is not a mapping
+        if GR.H_IS_KEYED and not keyed[pos[level]]:
+            INDICES.append(f"tuple({{{GR.SYM_INDICES}}})")
+        else:
+            INDICES.append(f"{{{GR.SYM_INDICES}}}")
+
+    # the proofs of every level are bound one lambda at a time
+    ST.Define("ITEMS")
+    ST.Alias("ITEMS", "VAL")
+    NEWs = []
+    for level in perm:
+        NEW = ST.NewDefinedSymbol()
+        CB.Push(f"{{{NEW}}} = lambda {{ITEMS}}: {GRs[level].CODE_NEW_FROM_ITER2_AUTO()}")
+        NEWs.append(f"{{{NEW}}}")
+    ST.Define("INDEX")
+    GETs = []
+    for GR in GRs:
+        GET = ST.NewDefinedSymbol()
+        CB.Push(f"{{{GET}}} = lambda {{ITEMS}}, {{INDEX}}: {GR.CODE_GET_ITEM()}")
+        GETs.append(f"{{{GET}}}")
+
+    for SYM, constant in [("PERM", perm), ("POS", pos), ("KEYED", keyed)]:
+        ST.Define(SYM)
+        CB.BindConstant(SYM, constant)
+    CB.Push(
+        "return make_view(({VALUE}, {PERM}, {POS}, "
+        f"({', '.join(INDICES)},), {{KEYED}}, ({', '.join(NEWs)},), ({', '.join(GETs)},)))"
+    )
+
+
+# Positional levels of a rectangular value are transposed through one flat
+# list of its items: the items of each level of the result are slices of it,
+# taken at the strides of the level they come from.
+def push_strided(CB: CodeBuilder, GRs, perm: PermSpec) -> None:
+    ST = CB.ST
+    LENGTHs = [f"{{{GR.SYM_LENGTH_REF}}}" for GR in GRs]
+
+    FLAT = "{VALUE}"
+    for _ in GRs[1:]:
+        FLAT = f"chain_from_iterable({FLAT})"
+    ST.Define("FLAT")
+    CB.Push(f"{{FLAT}} = list({FLAT})")
+
+    STRIDEs = [f"{{{ST.NewDefinedSymbol()}}}" for _ in GRs]
+    CB.Push(f"{STRIDEs[-1]} = 1")
+    for level in reversed(range(len(GRs) - 1)):
+        CB.Push(f"{STRIDEs[level]} = {STRIDEs[level + 1]} * {LENGTHs[level + 1]}")
+
+    # offsets of the first item of every innermost container of the result
+    ST.Define("BASES")
+    CB.Push("{BASES} = [0]")
+    ST.Define("BASE")
+    ST.Define("OFFSET")
+    for level in perm[:-1]:
+        STRIDE = STRIDEs[level]
+        CB.Push(
+            "{BASES} = [{BASE} + {OFFSET} for {BASE} in {BASES} "
+            f"for {{OFFSET}} in range(0, {LENGTHs[level]} * {STRIDE}, {STRIDE})]"
+        )
+
+    ST.Define("ITEMS")
+    ST.Define("ROW")
+    GR, LENGTH, STRIDE = GRs[perm[-1]], LENGTHs[perm[-1]], STRIDEs[perm[-1]]
+    CB.Push(
+        f"{{ITEMS}} = [{GR.CODE_NEW_FROM_ITER2_AUTO()} for {{BASE}} in {{BASES}} "
+        f"for {{ROW}} in ({{FLAT}}[{{BASE}} : {{BASE}} + {LENGTH} * {STRIDE} : {STRIDE}],)]",
+        VAL="ROW",
+    )
+    ST.Define("START")
+    for level in reversed(perm[1:-1]):
+        GR, LENGTH = GRs[level], LENGTHs[level]
+        CB.Push(
+            f"{{ITEMS}} = [{GR.CODE_NEW_FROM_ITER2_AUTO()} "
+            f"for {{START}} in range(0, len({{ITEMS}}), {LENGTH}) "
+            f"for {{ROW}} in ({{ITEMS}}[{{START}} : {{START}} + {LENGTH}],)]",
+            VAL="ROW",
+        )
+    CB.Push(f"return {GRs[perm[0]].CODE_NEW_FROM_ITER2_AUTO()}", VAL="ITEMS")
+
+
+# The levels above `start` stay in place and are rebuilt as they are, the
+# axes of each array below them being moved at once. Arrays are checked
+# against the shape of the first one found by the preparation pass.
+def push_array_run(CB: CodeBuilder, GRs, perm: PermSpec, start: int, check: bool) -> None:
+    ST = CB.ST
+    run = len(perm) - start
+    push_prep_pass(CB, GRs[:start], check)
+    if check:
+        ST.Define("ARRAY_SHAPE")
+        CB.Push(
+            f"{{ARRAY_SHAPE}} = {{VAL}}.shape[:{run}] if {{VAL}}.__class__ is ndarray else None"
+        )
+        push_check_pass(CB, GRs[:start])
+
+    LEVELs = [ST.NewDefinedSymbol() for _ in range(start + 1)]
+    for GR, LEVEL, NEXT in zip(GRs, LEVELs, LEVELs[1:]):
+        ST.DefineOrOverwrite("VAL")
+        CB.Push("def {LEVEL}({VAL}):", LEVEL=LEVEL)
+        CB.Indent()
+        ITEMS = ST.NewDefinedSymbol()
+        CB.Push(f"{{ITEMS}} = map({{NEXT}}, {GR.CODE_ITER_AUTO()})", ITEMS=ITEMS, NEXT=NEXT)
+        CB.Push(f"return {GR.CODE_NEW_FROM_ITER2_AUTO()}", VAL=ITEMS)
+        CB.Dedent()
+
+    ST.DefineOrOverwrite("VAL")
+    CB.Push("def {LEVEL}({VAL}):", LEVEL=LEVELs[-1])
+    CB.Indent()
     if check:
+        CB.Push(
+            f"if {{VAL}}.__class__ is not ndarray or {{VAL}}.ndim < {run} "
+            f"or {{VAL}}.shape[:{run}] != {{ARRAY_SHAPE}}:{{NL}}"
+            f'{{>>}}raise BoxMismatched(f"'
+            "ARG has unexpected shape\\n"
+            "ARG: {{repr_value({VAL})}}\\n"
+            f"SHAPE: {tuple(GR.Node for GR in GRs[start:])!r}"
+            '")',
+        )
+    ST.Define("AXES")
+    CB.BindConstant("AXES", tuple(level - start for level in perm[start:]))
+    ST.Define("RANGE")
+    CB.BindConstant("RANGE", tuple(range(run)))
+    CB.Push("return array_moveaxis({VAL}, {AXES}, {RANGE}).copy()")
+    CB.Dedent()
+    CB.Push("return {LEVEL}({VALUE})", LEVEL=LEVELs[0])
+
+
+# The items yielded below the permuted levels are passed through FUNC0,
+# FUNC1... once the levels left below them are rebuilt as in `tree_map`.
+# Returns the symbol of the function applied to each item.
+def push_leaf_funcs(CB: CodeBuilder, GRs, FUNCs, check: bool):
+    ST = CB.ST
+    if not GRs and len(FUNCs) == 1:
+        return FUNCs[0]
+
+    LEVELs = [ST.NewDefinedSymbol() for _ in GRs]
+    if len(FUNCs) == 1:
+        LEVELs.append(FUNCs[0])
+    else:
+        LEVELs.append(ST.NewDefinedSymbol())
+        ST.DefineOrOverwrite("VAL")
+        leaf = "{VAL}"
+        for FUNC in FUNCs:
+            leaf = f"{{{FUNC}}}({leaf})"
+        CB.Push(f"def {{LEVEL}}({{VAL}}):{{NL}}{{>>}}return {leaf}", LEVEL=LEVELs[-1])
+
+    for GR, LEVEL, NEXT in zip(GRs, LEVELs, LEVELs[1:]):
+        ST.DefineOrOverwrite("VAL")
+        CB.Push("def {LEVEL}({VAL}):", LEVEL=LEVEL)
+        CB.Indent()
+        if check:
+            push_check(CB, GR)
+        GR.Define_NEW_FROM_ITER2_PROOF(cond=GR.DEFINED_NEW_FROM_ITER2 and not GR.HasTarget)
+        ITEMS = ST.NewDefinedSymbol()
+        CB.Push(f"{{ITEMS}} = map({{NEXT}}, {GR.CODE_ITER_AUTO()})", ITEMS=ITEMS, NEXT=NEXT)
+        CB.Push(f"return {GR.CODE_NEW_FROM_ITER2_AUTO()}", VAL=ITEMS)
+        CB.Dedent()
+    return LEVELs[0]
+
+
+# With nfuncs, the leaf functions are applied while rebuilding, which is the
+# only path taken then: `pipeline` keeps array axes out of the permuted levels.
+@transform.build_func
+def transform_build(
+    hier: Hierarchy, permspec: PermSpec, check: bool, lazy: bool, view: bool, nfuncs: int = 0
+):
+    cycles, length = find_cycles(permspec, hier)
+    if cycles:
+        for node in hier[:length]:
+            if node.boxtype.Primitives["GET_INDICES"] is None:
+                raise BoxUnsupported(
+                    f"{node!r} is unordered and cannot be transposed, "
+                    f"it may only stay below the permuted levels"
+                )
+    assert not nfuncs or (cycles and not (lazy or view))
+    outer = hier[:1]
+    tail = hier[length:]
+    hier = hier[:length]
+    LEAF_FUNCs = [f"FUNC{i}" for i in range(nfuncs)]
+    CB = CodeBuilder([*LEAF_FUNCs, "VALUE"], None, None)
+    GRs, ST = CB.Setup(hier)
+
+    # operator should be identity when transformation is trivial
+    if not cycles:
+        if not lazy:
+            CB.Push("return {VALUE}")
+            return CB.End("transform")
+        # with the items of the outermost level handed out one by one, along
+        # with their keys for keyed levels
+        (GR,), _ = CB.Setup(outer)
+        ST.Define("VAL")
         CB.Push("{VAL} = {VALUE}")
-        for GR in GRs:
+        if check:
             CB.Push(
-                f"if {GR.CODE_ISNOTA2_AUTO()}:{{NL}}"
+                f"if {GR.CODE_ISNOTA()}:{{NL}}"
                 f'{{>>}}raise BoxMismatched(f"'
                 "ARG has unexpected shape\\n"
-                "ARG: {{{VAL}!r}}\\n"
+                "ARG: {{repr_value({VAL})}}\\n"
                 f"SHAPE: {GR.Node!r}"
                 '")',
             )
+        if GR.H_IS_KEYED:
+            CB.Push(f"return zip({GR.CODE_GET_INDICES()}, {GR.CODE_ITER_AUTO()})")
+        else:
+            CB.Push(f"return iter({GR.CODE_ITER_AUTO()})")
+        return CB.End("transform")
+
+    # axes of a single array are permuted at once instead of rebuilt
+    if all(GR.H_IS_ARRAY_AXIS and not GR.HasTarget for GR in GRs):
+        if check:
             CB.Push(
-                f"if {GR.CODE_LENGTH_MISMATCHED_AUTO()}:{{NL}}"
+                f"if {{VALUE}}.__class__ is not ndarray or {{VALUE}}.ndim < {length}:{{NL}}"
                 f'{{>>}}raise BoxMismatched(f"'
-                "ARG has unexpected length\\n"
-                "ARG: {{{VAL}!r}}\\n"
-                f"SHAPE: {GR.Node!r}\\n"
-                # "PROOF: {{{PROOF}!r}}"
+                "ARG has unexpected shape\\n"
+                "ARG: {{repr_value({VALUE})}}\\n"
+                f"SHAPE: {hier!r}"
                 '")',
             )
-            if GR is GRs[-1]:
-                break
+        ST.Define("AXES")
+        CB.BindConstant("AXES", permspec[:length])
+        ST.Define("RANGE")
+        CB.BindConstant("RANGE", tuple(range(length)))
+        if view:
+            # already a view of the original array
+            CB.Push("return array_moveaxis({VALUE}, {AXES}, {RANGE})")
+        elif lazy:
+            ST.Define("ROW")
+            CB.Push("return ({ROW}.copy() for {ROW} in array_moveaxis({VALUE}, {AXES}, {RANGE}))")
+        else:
+            CB.Push("return array_moveaxis({VALUE}, {AXES}, {RANGE}).copy()")
+        return CB.End("transform")
 
-            ST.DefineOrOverwrite("LOOP_VAR")
-            CB.Push(f"for {{LOOP_VAR}} in {GR.CODE_ITER2_AUTO()}:")
-            CB.Indent()
-            ST.Alias("LOOP_VAR", "VAL")
-        CB.DedentToFront()
+    # as well as the axes of arrays at the bottom of mixed hierarchies, when
+    # the levels above them stay in place
+    start = length
+    while start and GRs[start - 1].H_IS_ARRAY_AXIS and not GRs[start - 1].HasTarget:
+        start -= 1
+    if not (lazy or view) and 0 < start < length and permspec[:start] == tuple(range(start)):
+        push_array_run(CB, GRs, permspec[:length], start, check)
+        return CB.End("transform")
+
+    # deep permutations of positional levels are done with strides, which
+    # need rectangular values as ensured by the check pass: without it ragged
+    # values would be sliced silently instead of failing the lookups
+    strided = (
+        check
+        and not (lazy or view or nfuncs)
+        and length >= 3
+        and any(cycle.kind == REBUILD and len(cycle.range) > 1 for cycle in cycles)
+        and all(GR.H_IS_POSITIONAL and (GR.TargetGrocery or GR).H_IS_POSITIONAL for GR in GRs)
+    )
+    # with check="fused" the containers of each cycle are checked when the
+    # cycle is entered, and those of a swap while they are iterated, instead
+    # of in a pass of their own. The indices of dicts are only looked up, a
+    # missing one runs the full check pass to report the mismatched container.
+    # Lazy results and views are still checked upfront.
+    fused = check == "fused" and not (lazy or view or strided)
+    push_prep_pass(CB, GRs, check)
+    if check and not fused:
+        push_check_pass(CB, GRs)
+
+    if view:
+        push_view(CB, GRs, permspec[:length])
+        return CB.End("transform")
 
     CB.Push("if {EMPTIED}:")
     CB.Indent()
+    if fused:
+        push_check_pass(CB, GRs)
     deepest = True
     for cycle in reversed(cycles):
         for pindex in reversed(cycle.perm):
@@ -132,8 +430,24 @@ def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
                     VAL="RET_ITER",
                 )
             deepest = False
-    CB.Push(f"return {{RET}}(None)")
+    # the outermost level was the last one to be rebuilt
+    # and lazily its items come along with their keys for keyed levels
+    keyed = lazy and GRs[permspec[0]].H_IS_KEYED
+    if keyed:
+        ST.Alias(GRs[permspec[0]].SYM_INDICES, "KEYS")
+        CB.Push("return zip({KEYS}, {RET_ITER})")
+    else:
+        CB.Push("return {RET_ITER}" if lazy else "return {RET}(None)")
     CB.Dedent()
+
+    if strided:
+        push_strided(CB, GRs, permspec[:length])
+        return CB.End("transform")
+
+    if nfuncs:
+        tail_GRs, _ = CB.Setup(tail)
+        ST.Alias(push_leaf_funcs(CB, tail_GRs, LEAF_FUNCs, check), "LEAF")
+
     FUNCs = []
     CONs = []
 
@@ -145,25 +459,51 @@ def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
             CONs.append(ST.NewDefinedSymbol())
         else:
             nFUNC = 1
-        for _ in range(nFUNC):
+        for index in range(nFUNC):
             FUNC = ST.NewDefinedSymbol()
             FUNCs.append(FUNC)
             CB.Push("def {FUNC}():", FUNC=FUNC)
             CB.Indent()
+            if fused and index == 0:
+                ST.DefineOrOverwrite("VAL")
+                if cycle.kind == REBUILD:
+                    CHECKED, SRC = GRs[cycle.range.start : cycle.range.stop], CONs[-2]
+                else:
+                    CHECKED, SRC = GRs[cycle.range.start : cycle.range.start + 1], CONs[-1]
+                push_check_pass(CB, CHECKED, SRC, lookups=True)
 
     prev_GR = None
     for cycle in reversed(cycles):
         if cycle.kind == SWAP:
             GR1, GR2 = map(GRs.__getitem__, cycle.range)
             ST.DefineOrOverwrite("TMP")
-            CB.Push(
-                f"{{TMP}} = {GR1.CODE_ITER2_AUTO()}",
-                VAL=CONs[-1],
-            )
-            CB.Push(
-                f"{{TMP}} = ({GR2.CODE_ITER2_AUTO()} for {{VAL}} in {{TMP}})",
-                VAL=ST.NewDefinedSymbol(),
-            )
+            if fused:
+                CHECKED = ST.NewDefinedSymbol()
+                CB.Push("def {CHECKED}():", CHECKED=CHECKED)
+                CB.Indent()
+                ST.DefineOrOverwrite("LOOP_VAR")
+                CB.Push(f"for {{LOOP_VAR}} in {GR1.CODE_ITER2_AUTO()}:", VAL=CONs[-1])
+                CB.Indent()
+                ST.Alias("LOOP_VAR", "VAL")
+                push_level_check(CB, GR2, lookups=True)
+                if nfuncs:
+                    CB.Push(f"yield map({{LEAF}}, {GR2.CODE_ITER2_AUTO()})")
+                else:
+                    CB.Push(f"yield {GR2.CODE_ITER2_AUTO()}")
+                CB.Dedent(2)
+                CB.Push("{TMP} = {CHECKED}()", CHECKED=CHECKED)
+            else:
+                CB.Push(
+                    f"{{TMP}} = {GR1.CODE_ITER2_AUTO()}",
+                    VAL=CONs[-1],
+                )
+                ITEMS = GR2.CODE_ITER2_AUTO()
+                if nfuncs:
+                    ITEMS = f"map({{LEAF}}, {ITEMS})"
+                CB.Push(
+                    f"{{TMP}} = ({ITEMS} for {{VAL}} in {{TMP}})",
+                    VAL=ST.NewDefinedSymbol(),
+                )
             CB.Push(f"{{TMP}} = zip(*{{TMP}})")
             CB.Push(
                 f"{{TMP}} = ({GR1.CODE_NEW_FROM_ITER2_AUTO()} for {{VAL}} in {{TMP}})",
@@ -185,15 +525,16 @@ def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
                 if is_last_of_cycle:
                     ST.Alias(CONs[-2], "VAL")
                     ST.Alias(CONs[-1], "CUR")
-                    for index, ipindex in enumerate(cycle.perm):
+                    # items are picked level by level, in the original order
+                    for index, level in enumerate(cycle.range):
                         CB.Push(
-                            f"{{CUR}} = {GRs[ipindex].CODE_GET_ITEM()}",
+                            f"{{CUR}} = {GRs[level].CODE_GET_ITEM()}",
                             INDEX=INDEXs[index],
                         )
                         ST.Alias("CUR", "VAL")
 
                 if is_last_of_cycle and cycle.is_last:
-                    CB.Push("yield {CUR}")
+                    CB.Push("yield {LEAF}({CUR})" if nfuncs else "yield {CUR}")
                 else:
                     ST.DefineOrOverwrite("VAL")
                     CB.Push("{VAL} = {FUNC}()", FUNC=FUNCs[-1])
@@ -207,9 +548,23 @@ def transform_build(hier: Hierarchy, permspec: PermSpec, check: bool):
                 is_last_of_cycle = False
             CONs.pop()
 
+    if lazy:
+        CB.Push("return zip({KEYS}, {FUNC}())" if keyed else "return {FUNC}()", FUNC=FUNCs[-1])
+        return CB.End("transform")
+
+    if fused:
+        CB.Push("try:")
+        CB.Indent()
     ST.DefineOrOverwrite("VAL")
     CB.Push("{VAL} = {FUNC}()", FUNC=FUNCs[-1])
     CB.Push(f"return {prev_GR.CODE_NEW_FROM_ITER2_AUTO()}")
+    if fused:
+        CB.Dedent()
+        CB.Push("except LookupError:")
+        CB.Indent()
+        ST.DefineOrOverwrite("VAL")
+        push_check_pass(CB, GRs)
+        CB.Push("raise")
 
     return CB.End("transform")
 
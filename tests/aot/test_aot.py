@@ -0,0 +1,82 @@
+import runpy
+from collections import namedtuple
+
+import pytest
+
+import hako as hk
+from hako import boxes
+from hako.aot import emitter
+from hako.aot.__main__ import main
+from hako.codegen import magic
+from hako.operators import cachelib
+
+SPEC = """
+import hako as hk
+from hako.boxes import List, Dict, Tuple
+
+HAKO_AOT = [
+    List - Dict["foo", "bar"],
+    (hk.transform, List - Tuple, {"perm": "ab -> ba"}),
+    (hk.map, Tuple - Dict["x"], {"lazy": False, "check": False}),
+]
+"""
+
+
+@pytest.fixture
+def fresh_cache():
+    cachelib.cache_clear()
+    cachelib.prebuilt.clear()
+    yield
+    cachelib.cache_clear()
+    cachelib.prebuilt.clear()
+
+
+def _forbid_compile(*args, **kwargs):
+    raise AssertionError("compile() should be skipped for AOT-compiled hierarchies")
+
+
+def test_aot_roundtrip(tmp_path, fresh_cache, monkeypatch):
+    spec = tmp_path / "spec.py"
+    spec.write_text(SPEC)
+    output = tmp_path / "hako_compiled.py"
+    assert main([str(spec), "-o", str(output)]) == 0
+
+    cachelib.cache_clear()
+    cachelib.prebuilt.clear()
+    monkeypatch.setattr(magic, "compile", _forbid_compile, raising=False)
+    runpy.run_path(str(output))
+
+    hier = boxes.List - boxes.Dict["foo", "bar"]
+    val = [{"foo": 1, "bar": 2}, {"foo": 3, "bar": 4}]
+    assert hk.isa(hier)(val)
+    assert list(hk.map(hier)(str, val)) == ["1", "2", "3", "4"]
+    assert list(hk.flatten(hier)(val, val)) == [(1, 1), (2, 2), (3, 3), (4, 4)]
+    assert hk.transform(boxes.List - boxes.Tuple, perm="ab -> ba")(
+        [(1, 2), (3, 4)]
+    ) == ([1, 3], [2, 4])
+    assert hk.map(boxes.Tuple - boxes.Dict["x"], lazy=False, check=False)(
+        abs, ({"x": -1},)
+    ) == [1]
+
+
+def test_aot_missing_spec(tmp_path, fresh_cache):
+    spec = tmp_path / "spec.py"
+    spec.write_text("")
+    with pytest.raises(SystemExit):
+        main([str(spec), "-o", str(tmp_path / "out.py")])
+
+
+def test_aot_skips_unsupported(fresh_cache, monkeypatch):
+    Point = namedtuple("Point", "x y")
+    hier = boxes.List - boxes.Attrs[Point, "x"]
+    _, kept = emitter.collect(emitter.normalize_entries([hier]))
+    assert "lift" not in [name for name, *_ in kept]
+    assert "map" in [name for name, *_ in kept]
+
+    # other errors of the builders are not mistaken for unsupported boxes
+    def broken(*args, **kwargs):
+        raise TypeError("bug")
+
+    monkeypatch.setitem(emitter.OPERATORS, "lift", broken)
+    with pytest.raises(TypeError, match="bug"):
+        emitter.collect(emitter.normalize_entries([hier]))
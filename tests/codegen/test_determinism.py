@@ -0,0 +1,41 @@
+import os
+import sys
+import subprocess
+
+SCRIPT = """
+import sys, linecache
+import hako as hk
+from hako.boxes import List, Dict, Tuple
+
+if sys.argv[1] == "warmup":
+    hk.transform(List - Tuple - Dict, perm="abc -> cab")
+    hk.map(Tuple - Dict["other"], lazy=False, ninputs=1)
+
+func = hk.transform(List - Dict["a", "b"] - Tuple, perm="abc -> bca")
+filename = func.__code__.co_filename
+print(filename)
+print("".join(linecache.getlines(filename)))
+"""
+
+
+def _run(mode: str, hashseed: str) -> str:
+    env = dict(os.environ, PYTHONHASHSEED=hashseed)
+    # both wrap generated functions, whose code then lives elsewhere
+    env.pop("HAKO_DUMP_DIR", None)
+    env.pop("HAKO_PROFILE", None)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    return subprocess.run(
+        [sys.executable, "-c", SCRIPT, mode],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+
+
+def test_same_source_across_processes():
+    cold = _run("cold", "1")
+    warm = _run("warmup", "2")
+    assert cold == warm
+    assert cold.startswith("hako::codegen::")
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from hako import boxes
+from hako.codegen import diskcache, magic
+from hako.operators.market.destructions import map_single
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    diskcache.set_cache_dir(tmp_path)
+    yield tmp_path
+    diskcache.set_cache_dir(None)
+
+
+def _entries(cache_dir):
+    return [name for _, _, names in os.walk(cache_dir) for name in names]
+
+
+def _forbid_compile(*args, **kwargs):
+    raise AssertionError("compile() should be skipped on cache hit")
+
+
+def test_roundtrip(cache_dir, monkeypatch):
+    hier = (boxes.List[None], boxes.Dict["foo"])
+    val = [{"foo": 1}, {"foo": 2}]
+
+    func = map_single(hier, False, True)
+    assert func(str, val) == ["1", "2"]
+    assert len(_entries(cache_dir)) == 1
+
+    monkeypatch.setattr(magic, "compile", _forbid_compile, raising=False)
+    func = map_single(hier, False, True)
+    assert func(str, val) == ["1", "2"]
+    assert func.__code__.co_filename.startswith("hako::codegen::")
+
+
+def test_corrupted_entry(cache_dir):
+    hier = (boxes.Tuple[None],)
+    map_single(hier, False, True)
+    (path,) = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(cache_dir)
+        for name in names
+    ]
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+    func = map_single(hier, False, True)
+    assert func(abs, (-1, 2)) == [1, 2]
+    assert diskcache.load(os.path.basename(path)[: -len(".marshal")]) is not None
+
+
+def test_clear(cache_dir):
+    map_single((boxes.List[None],), True, False)
+    assert _entries(cache_dir)
+    diskcache.clear()
+    assert not _entries(cache_dir)
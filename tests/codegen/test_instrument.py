@@ -0,0 +1,53 @@
+import pytest
+
+import hako as hk
+from hako import boxes
+from hako.misc import instrument
+
+
+@pytest.fixture
+def records():
+    received = []
+    instrument.reset()
+    instrument.enable(received.append)
+    yield received
+    instrument.disable()
+    instrument.reset()
+
+
+def test_build_records(records):
+    hier = boxes.List - boxes.Dict["instrument"] - boxes.Tuple
+    func = hk.map(hier, lazy=False)
+    func(abs, [{"instrument": (-1,)}])
+    assert [(r.operator, r.variant) for r in hk.stats()] == [
+        ("map", "build_func_single_arg"),
+    ]
+    func(max, [{"instrument": (-1,)}], [{"instrument": (1,)}])
+
+    stats = hk.stats()
+    assert stats == records
+    assert [(r.operator, r.variant) for r in stats] == [
+        ("map", "build_func_single_arg"),
+        ("map", "build_func_multi_arg"),
+    ]
+    for record in stats:
+        assert record.hier == hier
+        assert record.codegen_time > 0
+        assert record.compile_time > 0
+        assert record.source_length > 0
+        assert record.loop_depth == 3
+        assert record.loops >= 3
+
+
+def test_disabled(records):
+    instrument.disable()
+    hk.isa(boxes.List - boxes.Dict["instrument-disabled"])([])
+    assert hk.stats() == [] and records == []
+
+
+def test_bounded_records(records, monkeypatch):
+    monkeypatch.setattr(instrument, "_records", instrument.deque(maxlen=2))
+    for key in ["a", "b", "c"]:
+        hk.map(boxes.Dict[key], lazy=False, ninputs=1)
+    assert [r.hier[0].mdata for r in hk.stats()] == ["b", "c"]
+    assert len(records) == 3
@@ -0,0 +1,119 @@
+import ast
+
+import pytest
+
+import hako as hk
+from hako import boxes
+from hako.codegen import optimizer
+from hako.misc.exceptions import BoxMismatched
+from hako.operators.cachelib import cache_clear
+
+
+def _run(source: str, name: str, *args):
+    namespace = {}
+    exec(compile(optimizer.optimize(source), "<optimized>", "exec"), namespace)
+    return namespace[name](*args)
+
+
+def _names(tree: ast.AST):
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+
+
+def test_fold_constants():
+    source = (
+        "def f(x):\n"
+        "    if False:\n"
+        "        raise ValueError(x)\n"
+        "    if not True or x:\n"
+        "        return 1\n"
+        "    return 2\n"
+    )
+    tree = optimizer.optimize(source)
+    assert "ValueError" not in _names(tree)
+    assert _run(source, "f", 0) == 2
+    assert _run(source, "f", 1) == 1
+
+
+def test_dead_stores_and_chains():
+    source = (
+        "def f(x, i, j):\n"
+        "    unused = x\n"
+        "    y = x[i]\n"
+        "    y = y[j]\n"
+        "    return y\n"
+    )
+    tree = optimizer.optimize(source)
+    assert "unused" not in _names(tree)
+    (func,) = tree.body
+    assert len(func.body) == 2
+    assert _run(source, "f", [[1, 2]], 0, 1) == 2
+
+
+def test_bound_methods():
+    source = (
+        "def f(x):\n"
+        "    out = []\n"
+        "    def gen():\n"
+        "        for i in x:\n"
+        "            out.append(i)\n"
+        "            yield i\n"
+        "    return list(gen()), out\n"
+    )
+    tree = optimizer.optimize(source)
+    assert "out_append" in _names(tree)
+    assert _run(source, "f", [1, 2]) == ([1, 2], [1, 2])
+    assert _run(source, "f", []) == ([], [])
+
+
+def test_bound_methods_of_rebound_names():
+    # `out` may not be the list built in front of the loop
+    source = (
+        "def f(x, out):\n"
+        "    for i in x:\n"
+        "        out.append(i)\n"
+        "    res = []\n"
+        "    for i in x:\n"
+        "        res.append(i)\n"
+        "        res = [i]\n"
+        "    return out, res\n"
+    )
+    tree = optimizer.optimize(source)
+    assert not {"out_append", "res_append"} & _names(tree)
+    assert _run(source, "f", [1, 2], []) == ([1, 2], [2])
+
+
+@pytest.fixture
+def optimized():
+    cache_clear()
+    optimizer.enable()
+    yield
+    optimizer.disable()
+    cache_clear()
+
+
+HIER = boxes.List - boxes.Dict["a", "b"] - boxes.Tuple
+VAL = [{"a": (1, 2), "b": (3, 4)}, {"a": (5, 6), "b": (7, 8)}]
+
+
+@pytest.mark.parametrize(
+    "make, args",
+    [
+        (lambda: hk.isa(HIER), (VAL,)),
+        (lambda: hk.map(HIER, lazy=False, ninputs=2), (max, VAL, VAL)),
+        (lambda: hk.flatten(HIER, lazy=False), (VAL,)),
+        (lambda: hk.flatten(HIER, lazy=False, structure=True), (VAL,)),
+        (lambda: hk.transform(HIER, perm="abc -> bca"), (VAL,)),
+        (lambda: hk.transform(HIER, perm="abc -> bca"), ([{"a": (1,)}],)),
+    ],
+)
+def test_same_results(optimized, make, args):
+    def outcome():
+        try:
+            return make()(*args)
+        except BoxMismatched as e:
+            return str(e)
+
+    result = outcome()
+    optimizer.disable()
+    cache_clear()
+    assert outcome() == result
@@ -0,0 +1,61 @@
+import pytest
+
+import hako as hk
+from hako import boxes
+from hako.misc import profiling
+from hako.bricks.shaping import create_hierarchy_nocheck
+
+
+@pytest.fixture
+def profiled():
+    profiling.reset()
+    profiling.enable()
+    yield
+    profiling.disable()
+    profiling.reset()
+
+
+def _find(report, operator, variant, hier):
+    (function,) = [
+        f
+        for f in report["functions"]
+        if (f["operator"], f["variant"], f["hier"]) == (operator, variant, repr(hier))
+    ]
+    return function
+
+
+def test_loop_counts(profiled):
+    hier = boxes.List - boxes.Dict["profiling"] - boxes.Tuple
+    func = hk.map(hier, lazy=False, ninputs=1)
+    val = [{"profiling": (1, 2)}, {"profiling": (3,)}]
+    for _ in range(2):
+        assert func(abs, val) == [1, 2, 3]
+
+    function = _find(profiling.report(), "map", "build_func_single_arg", hier)
+    assert function["calls"] == 2
+    assert function["wall_time"] > 0
+    assert [loop["count"] for loop in function["loops"]] == [4, 4, 6]
+
+
+def test_lazy_and_merge(profiled):
+    hier = create_hierarchy_nocheck(boxes.Tuple - boxes.List)
+    func = hk.flatten(hier, ninputs=1)
+    assert list(func(([1], [2, 3]))) == [1, 2, 3]
+
+    report = profiling.report()
+    merged = profiling.merge(report, report)
+    function = _find(merged, "flatten", "build_func_single_arg", hier)
+    assert function["calls"] == 2
+    assert [loop["count"] for loop in function["loops"]] == [4, 6]
+
+
+def test_wrap_keeps_signature():
+    profile = profiling.FuncProfile("op", "variant", None, [])
+
+    def func(x, *, y=1):
+        return x + y
+
+    wrapped = profiling.wrap(func, profile)
+    assert wrapped(1, y=2) == 3
+    assert wrapped.__wrapped__ is func and wrapped.__name__ == "func"
+    assert profile.calls == 1
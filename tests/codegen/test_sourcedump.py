@@ -0,0 +1,34 @@
+import json
+import traceback
+
+import pytest
+
+import hako as hk
+from hako import boxes
+from hako.codegen import sourcedump
+
+
+@pytest.fixture
+def dump_dir(tmp_path):
+    sourcedump.set_dump_dir(tmp_path)
+    yield tmp_path
+    sourcedump.set_dump_dir(None)
+
+
+def test_dump_and_traceback(dump_dir):
+    hier = boxes.List - boxes.Dict["sourcedump"]
+    func = hk.map(hier, lazy=False, ninputs=1)
+
+    with open(dump_dir / sourcedump.INDEX_FILENAME) as f:
+        entries = [json.loads(line) for line in f]
+    (entry,) = [e for e in entries if e["variant"] == "build_func_single_arg"]
+    assert entry["operator"] == "map"
+    assert entry["hier"] == repr(hier)
+    assert entry["file"].startswith("map_single_arg-List_SingleItemDict_sourcedump-")
+    path = dump_dir / entry["file"]
+    assert func.__code__.co_filename == str(path)
+
+    with pytest.raises(TypeError) as ctx:
+        func(abs, [{"sourcedump": "x"}])
+    frames = traceback.extract_tb(ctx.value.__traceback__)
+    assert any(frame.filename == str(path) and frame.line for frame in frames)
@@ -0,0 +1,95 @@
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import hako as hk
+from hako.misc.exceptions import BoxMismatched
+
+A = hk.Array
+
+
+@pytest.mark.parametrize(
+    "hier, perm, axes",
+    [
+        (A - A, "ab -> ba", (1, 0, 2)),
+        (A - A - A, "abc -> cab", (2, 0, 1)),
+        (A - A - A, "abc -> acb", (0, 2, 1)),
+        (A - A - A, "abc -> bca", (1, 2, 0)),
+    ],
+)
+def test_transform_axes(hier, perm, axes):
+    val = np.arange(24).reshape(2, 3, 4)
+    ret = hk.transform(hier, perm=perm)(val)
+    assert ret.flags.owndata
+    np.testing.assert_array_equal(ret, val.transpose(axes))
+
+
+def test_transform_mixed():
+    val = [np.arange(3), np.arange(3) * 2]
+    ret = hk.transform(hk.List - A, perm="ab -> ba")(val)
+    assert ret.__class__ is np.ndarray and ret.dtype == object
+    assert [list(x) for x in ret] == [[0, 0], [1, 2], [2, 4]]
+
+    val = np.empty(2, dtype=object)
+    val[0], val[1] = [1, 2], [3, 4]
+    ret = hk.transform(A - hk.List, perm="ab -> ba")(val)
+    assert ret.__class__ is list
+    np.testing.assert_array_equal(ret[1], [2, 4])
+
+
+def test_traversals():
+    val = np.arange(6).reshape(2, 3)
+    assert hk.isa(A - A)(val)
+    assert not hk.isa(A - A)(val.tolist())
+    assert hk.flatten(A - A, lazy=False)(val) == list(range(6))
+    assert hk.map(depth=2, lazy=False)(float, val) == [float(x) for x in range(6)]
+
+
+def test_mismatched():
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        hk.transform(A - A, perm="ab -> ba")(np.arange(3))
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        hk.transform(A - hk.List, perm="ab -> ba")(np.arange(4).reshape(2, 2))
+
+
+@pytest.mark.parametrize("check", [True, False])
+def test_transform_array_run(check):
+    val = {"x": [np.arange(24).reshape(2, 3, 4), np.arange(24, 48).reshape(2, 3, 4)]}
+    ret = hk.transform(hk.Dict - hk.List - A - A - A, perm="abcde -> abdec", check=check)(val)
+    assert list(ret) == ["x"] and len(ret["x"]) == 2
+    for item, expected in zip(ret["x"], val["x"]):
+        assert item.flags.owndata
+        np.testing.assert_array_equal(item, expected.transpose(1, 2, 0))
+    assert hk.transform(hk.List - A - A, perm="abc -> acb", check=check)([]) == []
+
+
+def test_transform_array_run_mismatched():
+    val = [np.arange(6).reshape(2, 3), np.arange(6).reshape(3, 2)]
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        hk.transform(hk.List - A - A, perm="abc -> acb")(val)
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        hk.transform(hk.List - A - A, perm="abc -> acb")([np.arange(3)])
+
+
+def test_empty_inner_shape():
+    val = np.zeros((0, 4))
+    assert hk.tree_map(A - A)(abs, val).shape == (0, 4)
+    assert hk.tree_map(A - A)(max, val, val).shape == (0, 4)
+    assert hk.transform(A - A, perm="ab -> ba")(val).shape == (4, 0)
+
+
+def test_mismatched_fresh_process():
+    # numpy loads its formatters on the first repr, here from generated code
+    code = (
+        "import numpy as np, hako as hk\n"
+        "from hako.misc.exceptions import BoxMismatched\n"
+        "try:\n"
+        "    hk.transform(hk.Array - hk.List, perm='ab -> ba')(np.arange(4).reshape(2, 2))\n"
+        "except BoxMismatched as e:\n"
+        "    print(e)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert "ARG: array([0, 1])" in out.stdout
@@ -0,0 +1,102 @@
+from collections import namedtuple
+from dataclasses import dataclass
+
+import pytest
+
+import hako as hk
+from hako.misc.exceptions import BoxMismatched
+
+
+@dataclass
+class Point:
+    x: object
+    y: object
+
+
+@dataclass(frozen=True)
+class Frozen:
+    x: object
+    y: object
+
+
+class Slotted:
+    __slots__ = ("a", "b")
+
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+
+    def __eq__(self, other):
+        return other.__class__ is Slotted and (self.a, self.b) == (other.a, other.b)
+
+
+Pair = namedtuple("Pair", "first second")
+
+
+@pytest.mark.parametrize(
+    "box, val, leaves",
+    [
+        (hk.Attrs[Point], Point(1, 2), [1, 2]),
+        (hk.Attrs[Point, "y"], Point(1, 2), [2]),
+        (hk.Attrs[Point, ("y", "x")], Point(1, 2), [2, 1]),
+        (hk.Attrs[Frozen], Frozen(1, 2), [1, 2]),
+        (hk.Attrs[Slotted], Slotted(1, 2), [1, 2]),
+    ],
+)
+def test_traversals(box, val, leaves):
+    hier = hk.List - box
+    assert hk.isa(hier)([val, val])
+    assert hk.flatten(hier, lazy=False)([val, val]) == leaves * 2
+    assert hk.map(hier, lazy=False)(max, [val], [val]) == leaves
+
+
+def test_exact_class():
+    assert not hk.isa(hk.Attrs[Point])(Frozen(1, 2))
+    assert not hk.isa(hk.Attrs[Point])({"x": 1, "y": 2})
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        hk.flatten(hk.Attrs[Point], lazy=False)(Frozen(1, 2))
+
+
+@pytest.mark.parametrize(
+    "hier, perm, val, expected",
+    [
+        (hk.List - hk.Attrs[Point], "ab -> ba", [Point(1, 2), Point(3, 4)], Point([1, 3], [2, 4])),
+        (hk.Attrs[Frozen] - hk.List, "ab -> ba", Frozen([1, 2], [3, 4]), [Frozen(1, 3), Frozen(2, 4)]),
+        (hk.Attrs[Slotted] - hk.Tuple, "ab -> ba", Slotted((1,), (2,)), (Slotted(1, 2),)),
+        (hk.List - hk.Attrs[Point] - hk.List, "abc -> bca", [Point([1], [2])], Point([[1]], [[2]])),
+        (hk.List - hk.Attrs[Point] - hk.List, "abc -> bca", [], Point([], [])),
+        (hk.Tuple - hk.Attrs[Pair], "ab -> ba", (Pair(1, 2),), Pair((1,), (2,))),
+    ],
+)
+def test_transform(hier, perm, val, expected):
+    assert hk.transform(hier, perm=perm)(val) == expected
+
+
+def test_fields_required():
+    with pytest.raises(TypeError):
+        hk.Attrs[object]
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda: hk.transform(hk.List - hk.Attrs[Point, "y"], perm="ab -> ba"),
+        lambda: hk.transform(hk.List - hk.Attrs[Pair, ("first",)], perm="ab -> ba"),
+        lambda: hk.lift(hk.Attrs[Point, "x"]),
+        lambda: hk.tree_map(hk.List - hk.Attrs[Slotted, "a"])(abs, [Slotted(1, 2)]),
+    ],
+)
+def test_subset_not_rebuilt(build):
+    with pytest.raises(TypeError, match="cannot be rebuilt"):
+        build()
+
+
+def test_subset_traversed():
+    val = [Point(1, 2), Point(3, 4)]
+    assert hk.flatten(hk.List - hk.Attrs[Point, "y"], lazy=False)(val) == [2, 4]
+    assert hk.map(hk.List - hk.Attrs[Point, ("y",)], lazy=False)(abs, val) == [2, 4]
+
+
+@pytest.mark.parametrize("box, expected", [(hk.Attrs[Pair], Pair([], [])), (hk.Attrs[Point], Point([], []))])
+def test_transform_empty(box, expected):
+    assert hk.transform(hk.List - box, perm="ab -> ba")([]) == expected
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from hako import operators as ops
+from hako.boxes import List, Tuple, Dict
+from hako.operators.cachelib import OperatorCache, cache
+
+
+def test_lru_eviction():
+    c = OperatorCache(maxsize=2)
+    c.set(("op", 1), "a")
+    c.set(("op", 2), "b")
+    assert c.get(("op", 1)) == "a"
+    c.set(("op", 3), "c")
+
+    assert ("op", 2) not in c
+    assert ("op", 1) in c and ("op", 3) in c
+    assert c.snapshot()["op"] == dict(
+        size=2, maxsize=2, hits=1, misses=0, evictions=1, compiles=3
+    )
+
+
+def test_per_operator_maxsize():
+    c = OperatorCache(maxsize=None)
+    for i in range(4):
+        c.set(("op", i), i)
+        c.set(("other", i), i)
+    c.configure("op", maxsize=1)
+
+    assert c.get(("op", 0)) is None
+    assert c.get(("op", 3)) == 3
+    assert len(c) == 5
+    snapshot = c.snapshot()
+    assert snapshot["op"]["evictions"] == 3
+    assert snapshot["op"]["misses"] == 1
+    assert snapshot["other"]["maxsize"] is None
+
+    c.configure(maxsize=2)
+    assert c.snapshot()["other"]["size"] == 2
+    assert c.snapshot()["op"]["maxsize"] == 1
+
+    with pytest.raises(ValueError):
+        c.configure(maxsize=0)
+
+
+def test_concurrent_counters():
+    c = OperatorCache(maxsize=4)
+    for i in range(4):
+        c.set(("op", i), i)
+
+    def hammer():
+        for i in range(2000):
+            c.get(("op", i % 8))
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = c.snapshot()["op"]
+    assert snapshot["hits"] + snapshot["misses"] == 8 * 2000
+    assert snapshot["hits"] == snapshot["misses"]
+    assert len(c) == 4
+
+
+def test_operator_counters():
+    hier = List - Dict["cachelib"] - Tuple
+    before = cache.snapshot().get("isa", {})
+    for _ in range(3):
+        assert ops.isa(hier)([{"cachelib": ()}])
+    after = cache.snapshot()["isa"]
+
+    assert after["compiles"] - before.get("compiles", 0) == 1
+    assert after["misses"] - before.get("misses", 0) == 1
+    assert after["hits"] - before.get("hits", 0) == 2
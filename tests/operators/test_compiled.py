@@ -0,0 +1,50 @@
+import pickle
+
+import pytest
+
+import hako as hk
+from hako import boxes
+
+HIER = boxes.List - boxes.Dict["a", "b"] - boxes.Tuple
+VAL = [{"a": (1, -2), "b": (3, 0)}, {"a": (5, 6), "b": (-4, 7)}]
+
+
+@pytest.mark.parametrize(
+    "operator, hier, options, args",
+    [
+        (hk.isa, HIER, {}, (VAL,)),
+        (hk.map, HIER, dict(lazy=False, ninputs=1), (abs, VAL)),
+        (
+            hk.map,
+            boxes.Tuple - boxes.Dict["compiled"],
+            dict(lazy=False, ninputs=2),
+            (max, ({"compiled": 1},), ({"compiled": 2},)),
+        ),
+        (hk.flatten, HIER, dict(lazy=False, ninputs=1), (VAL,)),
+        (hk.transform, HIER, dict(perm="abc -> cab"), (VAL,)),
+    ],
+)
+def test_compiled_matches_operator(operator, hier, options, args):
+    compiled = hk.bind(operator, hier, **options)
+    assert compiled.func is operator(hier, **options)
+    assert compiled(*args) == operator(hier, **options)(*args)
+    assert pickle.loads(pickle.dumps(compiled))(*args) == compiled(*args)
+
+
+@pytest.mark.parametrize(
+    "operator, hier, options, error",
+    [
+        (abs, HIER, {}, TypeError),
+        (hk.isa, (boxes.List, ...), {}, ValueError),
+        (hk.map, HIER, dict(lazy=False), TypeError),
+    ],
+)
+def test_bind_rejects(operator, hier, options, error):
+    with pytest.raises(error):
+        hk.bind(operator, hier, **options)
+
+
+def test_star_import_keeps_builtins():
+    namespace = {}
+    exec("from hako import *", namespace)
+    assert "compile" not in namespace
@@ -0,0 +1,103 @@
+import sys
+import threading
+from collections import Counter
+
+import pytest
+
+from hako import operators as ops
+from hako.boxes import List, Tuple, Dict
+from hako.operators.bases import BUILD_HOOKS
+from hako.codegen import CodeBuilder
+
+N_THREADS = 16
+
+
+@pytest.fixture
+def build_counter():
+    counter = Counter()
+    lock = threading.Lock()
+
+    def _hook(prebuilt_key, func):
+        with lock:
+            counter[prebuilt_key] += 1
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    BUILD_HOOKS.append(_hook)
+    yield counter
+    BUILD_HOOKS.remove(_hook)
+    sys.setswitchinterval(interval)
+
+
+def _run_concurrently(fn):
+    barrier = threading.Barrier(N_THREADS)
+    results = [None] * N_THREADS
+    errors = []
+
+    def _worker(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(N_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
+
+
+@pytest.mark.parametrize("round_", range(5))
+def test_single_flight(build_counter, round_):
+    key = f"concurrency-{round_}"
+    hier = List - Dict[key] - Tuple
+    val = [{key: (1, 2)}, {key: (3, 4)}]
+
+    def _call():
+        return (
+            ops.transform(hier, perm="abc -> cba")(val),
+            ops.map(hier, lazy=False)(abs, val),
+            ops.isa(hier)(val),
+        )
+
+    results = _run_concurrently(_call)
+    assert all(result == results[0] for result in results)
+    assert results[0][1] == [1, 2, 3, 4]
+
+    assert build_counter, "nothing was built"
+    assert set(build_counter.values()) == {1}, build_counter
+
+
+def test_concurrent_distinct_builds(build_counter):
+    lock = threading.Lock()
+    counter = iter(range(N_THREADS))
+
+    def _call():
+        with lock:
+            i = next(counter)
+        hier = List - Dict[f"distinct-{i}"]
+        return ops.flatten(hier, lazy=False)([{f"distinct-{i}": i}])
+
+    results = _run_concurrently(_call)
+    assert sorted(results) == [[i] for i in range(N_THREADS)]
+    assert set(build_counter.values()) == {1}
+
+
+def test_builder_owner_thread(monkeypatch):
+    monkeypatch.setattr("hako.flags.DEBUG", True)
+    CB = CodeBuilder(["VAL"], None, None)
+    errors = []
+
+    def _push():
+        try:
+            CB.Push("return {VAL}")
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=_push)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
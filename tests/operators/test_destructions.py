@@ -3,6 +3,7 @@ from itertools import product
 
 import pytest
 
+import hako as hk
 from hako import operators as ops
 from hako.bricks.shaping import Hierarchy
 from hako.testing.generator import Generator
@@ -120,3 +121,29 @@ def test_destruction_multi_diff_hier(hier: Hierarchy, tester: TTester, _times: i
         tester(hier, [x, x2])
 
     assert ctx.value.args[0].startswith("1-th ARG has unexpected shape")
+
+
+@pytest.mark.parametrize("hier, _times", list(product(HIER_CANDIDATES, range(N_TEST_TIMES))))
+def test_unflatten(hier: Hierarchy, _times: int):
+    gen = Generator()
+    x = gen.build_value(hier).retval
+
+    leaves, structdef = ops.flatten(hier, structure=True)(x)
+    assert leaves == ops.flatten(hier, lazy=False)(x)
+    assert ops.unflatten(hier)(structdef, leaves) == x
+    # values of the same shape share their structure definition
+    x2 = ops.tree_map(hier)(repr, x)
+    leaves2, structdef2 = ops.flatten(hier, structure=True)(x2)
+    assert structdef2 == structdef and hash(structdef2) == hash(structdef)
+    assert structdef.unflatten(leaves2) == x2
+
+    with pytest.raises(BoxMismatched, match="LEAVES has unexpected length"):
+        structdef.unflatten(leaves + [None])
+
+
+@pytest.mark.parametrize("hier", [hk.Iter, hk.List - hk.Iter])
+def test_structure_unsized(hier):
+    with pytest.raises(TypeError, match="structure=True"):
+        hk.flatten(hier, structure=True)
+    with pytest.raises(TypeError, match="structure=True"):
+        hk.flatten(hier, lazy=False, structure=True, ninputs=1)
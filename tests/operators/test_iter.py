@@ -0,0 +1,50 @@
+from itertools import count, islice
+
+import pytest
+
+import hako as hk
+from hako.misc.exceptions import BoxMismatched
+from hako.misc.functional import zip_strict
+
+
+def records(n):
+    return ({"id": i, "tags": [i, -i]} for i in range(n))
+
+
+def test_streaming():
+    hier = hk.Iter - hk.Dict["tags"] - hk.List
+    assert hk.flatten(hier, lazy=False)(records(2)) == [0, 0, 1, -1]
+    assert hk.map(hier, lazy=False)(abs, records(2)) == [0, 0, 1, 1]
+    assert not hk.isa(hk.Iter)([1, 2])
+
+    # unbounded inputs are consumed as the output is
+    leaves = hk.flatten(hk.Iter - hk.List)([i] for i in count())
+    assert list(islice(leaves, 3)) == [0, 1, 2]
+
+
+def test_checked_while_streaming():
+    it = hk.flatten(hk.Iter - hk.List)(iter([[1], [2], 3]))
+    assert next(it) == 1
+    assert next(it) == 2
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        next(it)
+
+
+@pytest.mark.parametrize("sizes, match", [((3, 2), "shorter"), ((2, 3), "longer")])
+def test_multi_args(sizes, match):
+    map_ = hk.map(hk.Iter - hk.Dict["id"], lazy=False)
+    assert map_(max, records(2), records(2)) == [0, 1]
+    with pytest.raises(BoxMismatched, match=f"1-th ARG has different length.*{match}"):
+        map_(max, *(records(n) for n in sizes))
+
+
+def test_nested():
+    assert hk.map(hk.List - hk.Iter, lazy=False)(max, [iter([1, 2])], [iter([3, 0])]) == [3, 2]
+    assert list(hk.lift(hk.Iter - hk.Tuple)((1, 2))) == [(1, 2)]
+
+
+def test_zip_strict_mismatched():
+    with pytest.raises(BoxMismatched, match="1-th ARG"):
+        list(zip_strict([1, 2], [1]))
+    with pytest.raises(BoxMismatched, match="longer"):
+        list(zip_strict([1], [1, 2]))
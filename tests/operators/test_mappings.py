@@ -0,0 +1,72 @@
+import pytest
+
+import hako as hk
+from hako import operators as ops
+from hako.bricks.shaping import Hierarchy
+from hako.testing.generator import Generator
+from hako.misc.exceptions import BoxMismatched
+
+from ._hyper_parameters import HIER_CANDIDATES, N_TEST_TIMES
+
+
+@pytest.mark.parametrize("hier", HIER_CANDIDATES)
+@pytest.mark.parametrize("_times", range(N_TEST_TIMES))
+def test_tree_map(hier: Hierarchy, _times: int):
+    gen = Generator()
+    x = gen.build_value(hier).retval
+    assert ops.tree_map(hier)(lambda v: v, x) == x
+
+    pairs = ops.tree_map(hier)(lambda a, b: (a, b), x, x)
+    assert ops.flatten(hier, lazy=False)(pairs) == ops.map(hier, lazy=False)(
+        lambda a, b: (a, b), x, x
+    )
+
+
+def test_targets_and_guess():
+    val = {"a": [1, -2], "b": [3]}
+    assert hk.tree_map(hk.Dict - hk.List / hk.Tuple)(abs, val) == {"a": (1, 2), "b": (3,)}
+    assert hk.tree_map(depth=2)(abs, val) == {"a": [1, 2], "b": [3]}
+    assert hk.tree_map(hk.Dict["a"] - hk.Tuple)(abs, {"a": (-1,), "b": 2}) == {"a": (1,)}
+
+
+def test_mismatched():
+    tree_map = hk.tree_map(hk.Dict - hk.List)
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        tree_map(abs, {"a": (1,)})
+    with pytest.raises(BoxMismatched, match="different length"):
+        tree_map(max, {"a": [1, 2]}, {"a": [1]})
+
+
+@pytest.mark.parametrize(
+    "args",
+    [({"a": (1,)},), ({"a": [1, 2]}, {"a": [1]}), ({"a": [1]}, {"a": (1,)})],
+)
+def test_mismatched_as_map(args):
+    # both operators share the checks of each level
+    errors = []
+    for op in [hk.map(hk.Dict - hk.List, lazy=False), hk.tree_map(hk.Dict - hk.List)]:
+        with pytest.raises(BoxMismatched) as info:
+            op(max, *args)
+        errors.append(str(info.value))
+    assert errors[0] == errors[1]
+
+
+@pytest.mark.parametrize("hier", [h for h in HIER_CANDIDATES if h[-1].boxtype is not hk.Tuple])
+def test_tree_map_inplace(hier: Hierarchy):
+    gen = Generator()
+    x = gen.build_value(hier).retval
+    expected = ops.tree_map(hier)(repr, x)
+    assert ops.tree_map(hier, inplace=True)(repr, x) is x
+    assert x == expected
+
+    x2 = ops.tree_map(hier)(lambda v: v, x)
+    assert ops.tree_map(hier, inplace=True)(lambda a, b: (a, b), x2, x) is x2
+    assert ops.flatten(hier, lazy=False)(x2) == ops.map(hier, lazy=False)(
+        lambda v: (v, v), x
+    )
+
+
+@pytest.mark.parametrize("hier", [hk.List - hk.Tuple, hk.List / hk.Tuple, hk.Dict - hk.Set])
+def test_tree_map_inplace_immutable(hier):
+    with pytest.raises(TypeError, match="inplace=True"):
+        hk.tree_map(hier, inplace=True)
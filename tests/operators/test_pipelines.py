@@ -0,0 +1,129 @@
+import pytest
+
+import hako as hk
+from hako import operators as ops
+from hako.bricks.shaping import Hierarchy
+from hako.testing.generator import Generator
+from hako.misc.exceptions import BoxMismatched
+
+from ._hyper_parameters import HIER_CANDIDATES
+
+
+def chained(hier, perm, val):
+    # what the fused pipeline replaces
+    assert ops.isa(hier)(val)
+    val = ops.transform(hier, perm=perm)(val)
+    if perm == "ab -> ba":
+        hier = (hier[1], hier[0]) + hier[2:]
+    val = ops.tree_map(hier)(repr, val)
+    return ops.map(hier, lazy=False)(len, val)
+
+
+@pytest.mark.parametrize("hier", [h for h in HIER_CANDIDATES if len(h) >= 2])
+@pytest.mark.parametrize("perm", ["ab -> ab", "ab -> ba"])
+def test_fused(hier: Hierarchy, perm: str):
+    gen = Generator()
+    x = gen.build_value(hier).retval
+    stages = [
+        ops.isa,
+        (ops.transform, {"perm": perm}),
+        (ops.tree_map, repr),
+        (ops.map, len, {"lazy": False}),
+    ]
+    run = ops.pipeline(hier, stages)
+    assert len(run.calls) == 1
+    try:
+        expected = chained(hier, perm, x)
+    except BoxMismatched:
+        # random values are seldom transposable
+        with pytest.raises(BoxMismatched):
+            run(x)
+    else:
+        assert run(x) == expected
+
+
+@pytest.mark.parametrize("hier", [h for h in HIER_CANDIDATES if len(h) >= 2])
+@pytest.mark.parametrize("perm, spec", [("ab -> ba", (1, 0)), ("abc -> cab", (2, 0, 1))])
+def test_fused_containers(hier: Hierarchy, perm: str, spec: tuple):
+    if len(spec) > len(hier):
+        pytest.skip("perm deeper than hier")
+    gen = Generator()
+    x = gen.build_value(hier).retval
+    stages = [(ops.transform, {"perm": perm}), (ops.tree_map, repr), (ops.tree_map, len)]
+    run = ops.pipeline(hier, stages)
+    assert len(run.calls) == 1
+    try:
+        expected = ops.transform(hier, perm=perm)(x)
+    except BoxMismatched:
+        with pytest.raises(BoxMismatched):
+            run(x)
+        return
+    permuted = tuple(hier[i] for i in spec) + hier[len(spec) :]
+    expected = ops.tree_map(permuted)(lambda leaf: len(repr(leaf)), expected)
+    assert run(x) == expected
+
+
+def test_fused_leaves():
+    hier = hk.List - hk.List - hk.Dict["x"]
+    run = hk.pipeline(hier, [(hk.transform, {"perm": "ab -> ba"}), (hk.tree_map, abs)])
+    assert len(run.calls) == 1
+    assert run([[{"x": -1}, {"x": 2}], [{"x": -3}, {"x": 4}]]) == [
+        [{"x": 1}, {"x": 3}],
+        [{"x": 2}, {"x": 4}],
+    ]
+    # levels below the permuted ones are checked while rebuilt
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        run([[{"x": -1}, {"y": 2}], [{"x": -3}, {"x": 4}]])
+
+    hier = hk.List - hk.Tuple - hk.List
+    stages = [(hk.transform, {"perm": "abc -> cab"}), (hk.tree_map, abs), (hk.tree_map, str)]
+    run = hk.pipeline(hier, stages)
+    assert len(run.calls) == 1
+    val = [([1, -2], [3, -4]), ([-5, 6], [7, -8])]
+    assert run(val) == [[("1", "3"), ("5", "7")], [("2", "4"), ("6", "8")]]
+
+
+def test_arrays_not_fused():
+    np = pytest.importorskip("numpy")
+    stages = [(hk.transform, {"perm": "ab -> ba"}), (hk.tree_map, abs)]
+    run = hk.pipeline(hk.Array - hk.Array, stages)
+    assert len(run.calls) == 2
+    assert (run(np.array([[1, -2], [-3, 4]])) == np.array([[1, 3], [2, 4]])).all()
+
+
+def test_fallbacks():
+    hier = hk.List - hk.Dict["a", "b"]
+    val = [{"a": 1, "b": -2}, {"a": 3, "b": 4}]
+    transpose = (hk.transform, {"perm": "ab -> ba"})
+    assert hk.pipeline(hier, [transpose, (hk.map, abs, {"lazy": False})])(val) == [1, 3, 2, 4]
+    assert hk.pipeline(hier, [transpose, (hk.tree_map, abs)])(val) == {"a": [1, 3], "b": [2, 4]}
+    assert hk.pipeline(hier, [(hk.tree_map, abs)])(val) == [{"a": 1, "b": 2}, {"a": 3, "b": 4}]
+    assert hk.pipeline(hier, [hk.isa])(val) is val
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        hk.pipeline(hier, [hk.isa])([{"a": 1}])
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        hk.pipeline(hier, [transpose, (hk.flatten, {"lazy": False})])([{"a": 1}])
+
+
+def test_validation_message():
+    hier = hk.List - hk.Dict["a", "b"]
+    bad = [{"a": 1, "b": 2}, {"a": 1}]
+    with pytest.raises(BoxMismatched) as expected:
+        hk.tree_map(hier)(abs, bad)
+    with pytest.raises(BoxMismatched) as raised:
+        hk.pipeline(hier, [hk.isa])(bad)
+    assert str(raised.value) == str(expected.value)
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [[hk.lift], [hk.flatten, hk.isa], [(hk.map,)], [(hk.map, abs, {"vectorize": True})], [hk.transform]],
+)
+def test_invalid_stages(stages):
+    with pytest.raises(TypeError):
+        hk.pipeline(hk.List - hk.List, stages)
+
+
+def test_transform_needs_perm():
+    with pytest.raises(TypeError, match="needs perm"):
+        hk.pipeline(hk.List - hk.List, [(hk.transform, {"check": False})])
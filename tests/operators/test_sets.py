@@ -0,0 +1,45 @@
+import pytest
+
+import hako as hk
+from hako.misc.exceptions import BoxMismatched
+
+
+@pytest.mark.parametrize("box, cls", [(hk.Set, set), (hk.FrozenSet, frozenset)])
+def test_traversals(box, cls):
+    hier = hk.List - box
+    val = [cls({1, 2}), cls(), cls({3})]
+    assert hk.isa(hier)(val)
+    assert not hk.isa(hier)([cls({1}), [1]])
+    assert sorted(hk.flatten(hier, lazy=False)(val)) == [1, 2, 3]
+    assert sorted(hk.map(hier, lazy=False)(lambda x: -x, val)) == [-3, -2, -1]
+    assert hk.lift(box - hk.Tuple)((1, 2)) == cls({(1, 2)})
+
+
+def test_guess():
+    val = {"a": frozenset({1, 2}), "b": frozenset({3})}
+    assert sorted(hk.map(depth=2, lazy=False)(abs, val)) == [1, 2, 3]
+    assert sorted(hk.flatten(hk.Dict - ..., lazy=False)(val)) == [1, 2, 3]
+
+
+def test_multi_args():
+    # sets traversed together must be equal, they are walked in the same order
+    map_ = hk.map(hk.List - hk.Set, lazy=False)
+    assert map_(lambda x, y: (x, y), [{1, 2}], [{2, 1}]) == [(1, 1), (2, 2)]
+    with pytest.raises(BoxMismatched, match="unexpected shape"):
+        map_(lambda x, y: (x, y), [{1, 2}], [{1, 3}])
+
+
+def test_transform():
+    # set levels have no indices, they can only stay innermost
+    val = [[{1}], [{2, 3}]]
+    assert hk.transform(hk.List - hk.List - hk.Set, perm="abc -> bac")(val) == [[{1}, {2, 3}]]
+    with pytest.raises(TypeError, match="unordered"):
+        hk.transform(hk.List - hk.Set, perm="ab -> ba")
+    with pytest.raises(TypeError, match="unordered"):
+        hk.transform(hk.FrozenSet - hk.List - hk.List, perm="abc -> acb")
+
+
+@pytest.mark.parametrize("empty", [set(), frozenset()])
+def test_guess_empty(empty):
+    with pytest.raises(IndexError, match="empty set"):
+        hk.map(depth=3, lazy=False)(abs, [empty])
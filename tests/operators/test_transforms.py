@@ -5,6 +5,7 @@ import pytest
 import numpy as np
 
 from hako import boxes, operators as ops
+from hako.misc.exceptions import BoxMismatched
 from hako.bricks.shaping import Hierarchy, create_hierarchy_nocheck
 from hako.boxes.dict import MultiItemsDict, SingleItemDict, VariadicDict
 from hako.testing.generator import HierarchyWrapper
@@ -70,7 +71,7 @@ for hier in HIER_CANDIDATES:
     hier = create_hierarchy_nocheck(hier)
     for times in range(N_TEST_TIMES):
         for perm in list(permutations(range(len(hier)))):
-            for check in [True, False]:
+            for check in [True, False, "fused"]:
                 for zero_dim in [None] + [
                     i
                     for i in range(len(hier))
@@ -90,3 +91,117 @@ def test_transforms(
     x, perm_x = build_test_pair(hier, perm, zero_dim=zero_dim)
     out = ops.transform(hier, perm=perm, check=check)(x)
     assert out == perm_x
+
+
+# deep permutations of positional levels go through the strided engine
+STRIDED_PARAMETERS = []
+for hier in [
+    boxes.List - boxes.List - boxes.List,
+    boxes.Tuple - boxes.List - boxes.Tuple,
+    boxes.List - boxes.Tuple - boxes.List - boxes.List,
+]:
+    hier = create_hierarchy_nocheck(hier)
+    for perm in permutations(range(len(hier))):
+        for check in [True, False]:
+            for zero_dim in [None, *range(len(hier))]:
+                STRIDED_PARAMETERS.append((hier, perm, check, zero_dim))
+
+
+@pytest.mark.parametrize("hier, perm, check, zero_dim", STRIDED_PARAMETERS)
+def test_transforms_strided(
+    hier: Hierarchy,
+    perm: t.Tuple[int, ...],
+    check: bool,
+    zero_dim: int,
+):
+    x, perm_x = build_test_pair(hier, perm, zero_dim=zero_dim)
+    out = ops.transform(hier, perm=perm, check=check)(x)
+    assert out == perm_x
+
+
+@pytest.mark.parametrize(
+    "x",
+    [[[[1, 2], [3, 4]], [[5, 6]]], [[[1, 2], [3, 4]], [[5, 6], [7]]], [[[1, 2], [3]], [[5, 6], [7, 8]]]],
+)
+def test_transforms_ragged_unchecked(x):
+    # ragged values are not sliced into a wrong result without the check pass
+    hier = boxes.List - boxes.List - boxes.List
+    with pytest.raises(IndexError):
+        ops.transform(hier, perm="abc -> cba", check=False)(x)
+
+
+LISTS = boxes.List - boxes.List - boxes.List
+DICTS = boxes.List - boxes.Dict - boxes.List
+MISMATCHED = [
+    (LISTS, [[[1, 2], [3, 4]], [[5, 6], [7]]]),
+    (LISTS, [[[1, 2], [3, 4]], [[5, 6]]]),
+    (LISTS, [[[1, 2], [3, 4]], [(5, 6), [7, 8]]]),
+    (LISTS, [[[1, 2], [3, 4]], ([5, 6], [7, 8])]),
+    (LISTS, [[[], []], [[1], []]]),
+    (DICTS, [{"a": [1, 2], "b": [3, 4]}, {"a": [5, 6]}]),
+    (DICTS, [{"a": [1, 2], "b": [3, 4]}, {"a": [5, 6], "c": [7, 8]}]),
+    (DICTS, [{"a": [1, 2], "b": [3, 4]}, [[5, 6], [7, 8]]]),
+    (DICTS, [{"a": [1, 2], "b": [3, 4]}, {"a": [5, 6], "b": [7]}]),
+]
+
+
+@pytest.mark.parametrize("perm", [p for p in permutations(range(3)) if p[2] != 2])
+@pytest.mark.parametrize("hier, x", MISMATCHED)
+def test_transforms_fused_mismatched(perm: t.Tuple[int, ...], hier: Hierarchy, x):
+    # both modes report the same container
+    with pytest.raises(BoxMismatched) as expected:
+        ops.transform(hier, perm=perm, check=True)(x)
+    with pytest.raises(BoxMismatched) as fused:
+        ops.transform(hier, perm=perm, check="fused")(x)
+    assert str(fused.value) == str(expected.value)
+
+
+@pytest.mark.parametrize(
+    "hier, perm, check, zero_dim, times_", [p for p in PARAMETERS if p[2] is True]
+)
+def test_transforms_lazy(
+    hier: Hierarchy,
+    perm: t.Tuple[int, ...],
+    check: bool,
+    zero_dim: int,
+    times_: int,
+):
+    x, perm_x = build_test_pair(hier, perm, zero_dim=zero_dim)
+    out = ops.transform(hier, perm=perm, lazy=True)(x)
+    assert iter(out) is out
+    # keyed levels hand out (key, item) pairs
+    expected = perm_x.items() if perm_x.__class__ is dict else perm_x
+    assert list(out) == list(expected)
+
+
+def test_transforms_lazy_keyed():
+    val = [{"a": 1, "b": 2}, {"a": 3, "b": 4}]
+    out = ops.transform(boxes.List - boxes.Dict["a", "b"], perm="ab -> ba", lazy=True)(val)
+    assert list(out) == [("a", [1, 3]), ("b", [2, 4])]
+    # as well as when nothing is transposed
+    out = ops.transform(boxes.Dict["a", "b"] - boxes.List, lazy=True)({"a": [1], "b": [2], "c": [3]})
+    assert dict(out) == {"a": [1], "b": [2]}
+
+
+@pytest.mark.parametrize(
+    "hier, perm, check, zero_dim, times_", [p for p in PARAMETERS if p[2] is True]
+)
+def test_transforms_view(
+    hier: Hierarchy,
+    perm: t.Tuple[int, ...],
+    check: bool,
+    zero_dim: int,
+    times_: int,
+):
+    x, perm_x = build_test_pair(hier, perm, zero_dim=zero_dim)
+    out = ops.transform(hier, perm=perm, view=True)(x)
+    if out is x:
+        assert out == perm_x
+        return
+    assert out.materialize() == perm_x
+    assert len(out) == len(perm_x)
+    # items are looked up level by level
+    pairs = perm_x.items() if perm_x.__class__ is dict else enumerate(perm_x)
+    for key, item in pairs:
+        sub = out[key]
+        assert (sub.materialize() if hasattr(sub, "materialize") else sub) == item
@@ -0,0 +1,74 @@
+import pytest
+
+import hako as hk
+from hako import boxes
+from hako.codegen.magic import capture_generated
+from hako.misc import instrument, profiling
+
+
+@pytest.fixture
+def records():
+    received = []
+    instrument.enable(received.append)
+    yield received
+    instrument.disable()
+    instrument.reset()
+
+
+def test_ninputs_cached_apart():
+    hier = boxes.List - boxes.Dict["variadic"]
+    single = hk.map(hier, lazy=False, ninputs=1)
+    multi = hk.map(hier, lazy=False, ninputs=2)
+    assert single is not multi
+    assert single(abs, [{"variadic": -1}]) == [1]
+    assert multi(max, [{"variadic": -1}], [{"variadic": 1}]) == [1]
+    with pytest.raises(TypeError):
+        multi(max, [{"variadic": -1}])
+
+
+def test_dispatch_builds_on_demand(records):
+    hier = boxes.Tuple - boxes.Dict["variadic-dispatch"]
+    val = ({"variadic-dispatch": 1},)
+    func = hk.flatten(hier, lazy=False)
+    assert records == []
+
+    for _ in range(2):
+        assert func(val) == [1]
+        assert func(val, val, val) == [(1, 1, 1)]
+    assert [r.variant for r in records] == ["build_func_single_arg", "build_func_multi_arg"]
+
+    # shared with the functions asked for explicitly
+    assert func(val, val) == [(1, 1)]
+    assert hk.flatten(hier, lazy=False, ninputs=2)(val, val) == [(1, 1)]
+    assert len(records) == 3
+
+
+def test_fixed_parameters_unpacked():
+    hier = boxes.List - boxes.Dict["variadic-unpacked"]
+    with capture_generated() as captured:
+        hk.visit(hier, ninputs=2)
+    (generated,) = captured
+    _, first, second = generated.func_sig.split(", ")
+    # the inputs are zipped as they are, never packed into a tuple
+    assert f"zip({first}, {second})" in generated.func_body
+    assert f"({first}, {second},)" not in generated.func_body
+
+
+@pytest.mark.skipif(profiling.ENABLED, reason="profiled functions are kept behind the dispatcher")
+def test_dispatcher_replaced_after_first_call(records):
+    hier = boxes.Tuple - boxes.Dict["variadic-replaced"]
+    val = ({"variadic-replaced": 1},)
+    dispatcher = hk.flatten(hier, lazy=False)
+    assert dispatcher(val, val) == [(1, 1)]
+
+    # later lookups return the function built for two inputs
+    func = hk.flatten(hier, lazy=False)
+    assert func is not dispatcher and func.__name__ == "flatten"
+    assert func(val, val) == [(1, 1)]
+    # which hands other numbers of arguments back to the dispatcher
+    assert func(val) == [1]
+    assert func(val, val, val) == [(1, 1, 1)]
+    with pytest.raises(TypeError):
+        func()
+    assert hk.flatten(hier, lazy=False) is func
+    assert len(records) == 3
@@ -0,0 +1,83 @@
+from array import array
+
+import pytest
+
+import hako as hk
+from hako.misc import vectorize
+
+HIER = hk.List - hk.Dict - hk.List
+VAL = [{"a": [1, 2], "b": [3.5]}, {"c": []}, {"d": [-4]}]
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(vectorize, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_single_input(backend, lazy):
+    batches = []
+
+    def func(batch):
+        batches.append(batch)
+        return batch * 2 if backend == "numpy" else array("d", (x * 2 for x in batch))
+
+    ret = hk.map(HIER, lazy=lazy, vectorize=True)(func, VAL)
+    assert (ret.__class__ is list) is not lazy
+    assert list(ret) == [2.0, 4.0, 7.0, -8.0]
+    assert len(batches) == 1 and len(batches[0]) == 4
+
+
+def test_multi_input(backend):
+    def func(lhs, rhs):
+        return [x - y for x, y in zip(lhs, rhs)]
+
+    other = [{"a": [0, 0], "b": [0.5]}, {"c": []}, {"d": [1]}]
+    ret = hk.map(HIER, lazy=False, vectorize=True)(func, VAL, other)
+    assert ret == [1.0, 2.0, 3.0, -5.0]
+    assert hk.map(HIER, lazy=False, vectorize=True, ninputs=2)(func, [], []) == []
+
+
+def test_wrong_length(backend):
+    with pytest.raises(ValueError, match="one value per leaf"):
+        hk.map(HIER, lazy=False, vectorize=True)(sum, VAL)
+
+
+def test_keep_dtype(backend):
+    kinds = []
+
+    def func(batch):
+        kinds.append([x.__class__ for x in batch])
+        return batch
+
+    assert hk.map(hk.List, lazy=False, vectorize=True)(func, [1, 2]) == [1, 2]
+    assert hk.map(hk.List, lazy=False, vectorize=True)(func, [True, False]) == [True, False]
+    assert kinds[0][0] is not float and kinds[1][0] is not float
+
+
+def test_lazy_deferred(backend):
+    calls = []
+    ret = hk.map(HIER, lazy=True, vectorize=True)(lambda batch: calls.append(batch) or batch, VAL)
+    assert not calls
+    assert list(ret) == [1.0, 2.0, 3.5, -4.0]
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    "val",
+    [[(1, 2), (3,)], [(1, 2), (3, 4)], ["a", "bc"], [1, 2**70]],
+)
+def test_non_scalar_leaves(backend, val):
+    batches = []
+
+    def func(batch):
+        batches.append(batch)
+        return batch
+
+    assert hk.map(hk.List, lazy=False, vectorize=True)(func, val) == val
+    assert len(batches[0]) == len(val)
+    assert list(batches[0]) == val
@@ -0,0 +1,70 @@
+import pytest
+
+import hako as hk
+from hako import boxes as b
+from hako.bricks.shaping import (
+    create_hierarchy_nocheck,
+    fingerprint_hierarchy,
+    guess_hierarchy,
+)
+from hako.operators.bases import INLINE_CACHE_SIZE
+
+PARAMETERS = [
+    [[(1, 2)], None, 2, [b.List, b.Tuple]],
+    [[{"x": 1, "y": 2}], None, 2, [b.List, b.Dict[["x", "y"]]]],
+    [({"x": [1]},), None, 3, [b.Tuple, b.Dict[["x"]], b.List]],
+    [[(1,)], (b.List, ...), None, [b.List, b.Tuple]],
+    [{"x": [1]}, (..., b.List), None, [b.Dict[["x"]], b.List]],
+]
+
+
+@pytest.mark.parametrize("val, partial_hier, depth, expected", PARAMETERS)
+def test_guess_hierarchy(val, partial_hier, depth, expected):
+    if partial_hier is not None:
+        partial_hier = create_hierarchy_nocheck(partial_hier)
+    assert guess_hierarchy(val, partial_hier, depth) == create_hierarchy_nocheck(
+        tuple(expected)
+    )
+
+
+@pytest.mark.parametrize(
+    "lhs, rhs, same",
+    [
+        [[(1,)], [(2, 3)], True],
+        [[(1,)], [[1]], False],
+        [[{"x": 1}], [{"x": 2}], True],
+        [[{"x": 1}], [{"y": 1}], False],
+        [[{"x": 1, "y": 1}], [{"y": 1, "x": 1}], False],
+    ],
+)
+def test_fingerprint(lhs, rhs, same):
+    assert (fingerprint_hierarchy(lhs, None, 2) == fingerprint_hierarchy(rhs, None, 2)) is same
+    assert (guess_hierarchy(lhs, None, 2) == guess_hierarchy(rhs, None, 2)) is same
+
+
+def test_guessing_operator():
+    func = hk.map(depth=2, lazy=False, ninputs=1)
+    assert func(abs, [{"x": -1}]) == [1]
+    assert func(abs, [(-1, 2)]) == [1, 2]
+    assert func(abs, [{"x": -3}]) == [3]
+    assert hk.flatten((b.List, ...), lazy=False)([[1], [2]]) == [1, 2]
+
+    with pytest.raises(ValueError):
+        func(abs, [1])
+
+
+def test_inline_cache_eviction():
+    func = hk.map(depth=2, lazy=False, ninputs=1)
+    cells = dict(zip(func.__code__.co_freevars, func.__closure__))
+    inline_cache = cells["inline_cache"].cell_contents
+    vals = [[{f"inline_{i}": -i}] for i in range(INLINE_CACHE_SIZE + 1)]
+    for i, val in enumerate(vals):
+        assert func(abs, val) == [i]
+
+    fingerprints = [fingerprint_hierarchy(val, None, 2) for val in vals]
+    assert len(inline_cache) == INLINE_CACHE_SIZE
+    assert fingerprints[0] not in inline_cache
+    assert fingerprints[-1] in inline_cache
+    # evicted shapes are guessed again
+    assert func(abs, vals[0]) == [0]
+    assert fingerprints[0] in inline_cache and fingerprints[1] not in inline_cache